@@ -0,0 +1,116 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from signal_store import FileBlock
+
+ALIGNED_PREFIX = 'Aligned: '  # the aligned signals of a file set are stored as the file 'Aligned: a.csv, b.csv'
+ALIGN_METHODS = ['interpolate', 'asof']  # linear interpolation or the last sample at or before the grid time
+MAX_ALIGNED_SAMPLES = 20_000_000  # a finer resolution is rejected
+ALIGN_CACHE_SIZE = 4  # aligned grids kept per (file set, offsets, resolution, method)
+
+
+# function to get the name of the block with the aligned signals of a file set (the same for every order of the files)
+# every file set has its own block, so aligning other files does not replace the signals which are listed already
+def get_aligned_filename(csv_filenames):
+    return ALIGNED_PREFIX + ', '.join(sorted(set(csv_filenames)))
+
+
+# function to check if a file of the signal store holds aligned signals
+def is_aligned_filename(csv_filename):
+    return csv_filename.startswith(ALIGNED_PREFIX)
+
+
+# function to get the default resolution of the common time base: the finest median sample step of the files
+def get_default_resolution(blocks):
+    steps = [np.median(np.diff(block.time)) for block in blocks if len(block) > 1]
+    steps = [step for step in steps if step > 0]
+    if not steps:
+        raise ValueError('the files have no time axis to align')
+    return float(min(steps))
+
+
+# function to get the time grid which covers all files (shifted by their offsets) with the given resolution
+def get_time_grid(blocks, offsets, resolution):
+    if resolution <= 0:
+        raise ValueError('the resolution has to be positive')
+    blocks = [(block, offset) for block, offset in zip(blocks, offsets) if len(block)]
+    if not blocks:
+        raise ValueError('the files have no samples')
+    start = min(block.time[0] + offset for block, offset in blocks)
+    end = max(block.time[-1] + offset for block, offset in blocks)
+    n_samples = int(np.floor((end - start) / resolution + 1e-9)) + 1
+    if n_samples > MAX_ALIGNED_SAMPLES:
+        raise ValueError(f'{n_samples} samples for a resolution of {resolution:g}, at most {MAX_ALIGNED_SAMPLES} are allowed')
+    return start + np.arange(n_samples) * resolution
+
+
+# function to get the resampling of a time axis to the grid, computed once per file and used for all its signals
+# returns the sample at or before every grid time, the sample after it, the interpolation weight (None for the as-of
+# join) and the grid times outside the time range of the file. The grid times have rounding errors (start + i * step),
+# so a sample up to 1e-9 steps after a grid time counts as at the grid time.
+def get_resampling(time, grid, method='interpolate'):
+    resolution = grid[1] - grid[0] if len(grid) > 1 else 1.0
+    search_grid = grid + 1e-9 * resolution
+    index = np.searchsorted(time, search_grid, side='right') - 1
+    outside = (index < 0) | (grid > time[-1] + 1e-9 * resolution)
+    index = np.clip(index, 0, len(time) - 1)
+    if method == 'asof':
+        return index, None, None, outside
+
+    next_index = np.minimum(index + 1, len(time) - 1)
+    step = time[next_index] - time[index]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(step > 0, np.clip((grid - time[index]) / step, 0.0, 1.0), 0.0)
+    return index, next_index, weight, outside
+
+
+# function to resample a signal with the resampling of its file, samples outside the time range of the file are NaN
+# the values keep their precision (float32 stays float32)
+def resample(values, resampling):
+    index, next_index, weight, outside = resampling
+    resampled = values[index]
+    if weight is not None:
+        resampled = (resampled + (values[next_index] - resampled) * weight).astype(values.dtype)
+    resampled[outside] = np.nan
+    return resampled
+
+
+# puts the signals of several files on a common time base, so files with other sample steps or start times can be
+# overlaid and compared sample by sample (e.g. by derived signals). The aligned grids are cached per file set.
+class TimeAligner:
+    def __init__(self, cache_size=ALIGN_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # key -> FileBlock, least recently used first
+
+    # function to align the signals of the blocks, returns one block with the signals named 'csv_filename: signal_name'
+    # named by get_aligned_filename
+    # offsets (seconds, default 0) are added to the time axis of every file, resolution None uses the finest sample step
+    def align(self, blocks, offsets=None, resolution=None, method='interpolate'):
+        if method not in ALIGN_METHODS:
+            raise ValueError(f"unknown method '{method}'")
+        if not blocks:
+            raise ValueError('no files to align')
+        offsets = [float(offset or 0.0) for offset in offsets] if offsets else [0.0] * len(blocks)
+        resolution = float(resolution) if resolution else get_default_resolution(blocks)
+
+        # the block versions change when a file is loaded again, so a changed file is never taken from the cache
+        key = (tuple((block.csv_filename, block.version, offset) for block, offset in zip(blocks, offsets)), resolution, method)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        grid = get_time_grid(blocks, offsets, resolution)
+        signals = {}
+        for block, offset in zip(blocks, offsets):
+            if not len(block):
+                continue
+            resampling = get_resampling(block.time + offset if offset else block.time, grid, method)
+            for signal_name, values in block.signals.items():
+                signals[f'{block.csv_filename}: {signal_name}'] = resample(values, resampling)
+
+        aligned = FileBlock(get_aligned_filename(block.csv_filename for block in blocks), grid, signals)
+        self._cache[key] = aligned
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return aligned
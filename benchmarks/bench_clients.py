@@ -0,0 +1,83 @@
+# load test of the shared signal store: N simulated clients with their own view state on the same loaded logs
+# usage: python benchmarks/bench_clients.py [--scale 20] [--clients 1 2 5 10 20]
+#
+# every client lists all signals, builds its four plots, deselects half of the signals of plot 2 and zooms plot 1.
+# RSS = resident memory of the process with all clients connected, zoom = server time of one zoom of one client
+# (reload of the visible window), the browser side is replaced by a fake client which only counts the sent bytes
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from common import CSV_DIR, FakeClient, FakePlot, get_rss, load_scaled_log
+from client_view import ClientView
+from signal_store import FileBlock, SignalStore
+
+
+# function to connect a simulated client: build all plots and change the selection like a user would
+def connect_client(client_id, signal_store):
+    view = ClientView(client_id, signal_store, lambda fig: fig)
+    view.client = FakeClient()
+    view.sync_signals()
+    for plot_view in view.plot_views:
+        plot_view.plot = FakePlot(view.client)
+        plot_view.build(view.df_signals)
+
+    view.df_signals.loc[view.df_signals.index[::2], 'plot2'] = False
+    for plot_view in view.plot_views:
+        plot_view.sync_selection(view.df_signals)
+    return view
+
+
+# function to zoom plot 1 of a client into a random window of the loaded time range
+def zoom(view, t_min, t_max, rng):
+    start = rng.uniform(t_min, t_max)
+    x_range = (start, start + 0.05 * (t_max - t_min))
+    begin = time.perf_counter()
+    view.plot_views[0].set_x_range(x_range)
+    return time.perf_counter() - begin
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=20)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 2, 5, 10, 20])
+    parser.add_argument('--zooms', type=int, default=20, help='zooms per client')
+    args = parser.parse_args()
+
+    # the logs are loaded once and shared by all clients
+    signal_store = SignalStore()
+    for path in sorted(CSV_DIR.glob('*.csv')):
+        signal_store.add(FileBlock.from_dataframe(path.name, load_scaled_log(path, args.scale)))
+    t_min = min(signal_store.block(name).time[0] for name in signal_store.filenames)
+    t_max = max(signal_store.block(name).time[-1] for name in signal_store.filenames)
+    base_rss = get_rss()
+    print(f"{len(signal_store)} files, {len(signal_store.keys())} signals, store {signal_store.nbytes / 1e6:.1f} MB, "
+          f"RSS {base_rss / 1e6:.1f} MB")
+
+    print(f"{'clients':>7} {'RSS MB':>8} {'MB/client':>9} {'refs':>5} {'zoom ms':>8} {'p95 ms':>7} {'sent MB':>8}")
+    rng = np.random.default_rng(0)
+    views = []
+    for n_clients in sorted(args.clients):
+        while len(views) < n_clients:
+            views.append(connect_client(len(views), signal_store))
+
+        # every client zooms in turn, like interleaved requests of the connected browsers
+        latencies = [zoom(view, t_min, t_max, rng) for _ in range(args.zooms) for view in views]
+        rss = get_rss()
+        latencies_ms = np.array(latencies) * 1000
+        bytes_sent = sum(view.client.bytes_sent for view in views)
+        print(f"{n_clients:>7} {rss / 1e6:>8.1f} {(rss - base_rss) / 1e6 / n_clients:>9.2f} "
+              f"{signal_store.ref_count(signal_store.filenames[0]):>5} {statistics.median(latencies_ms):>8.2f} "
+              f"{np.percentile(latencies_ms, 95):>7.2f} {bytes_sent / 1e6:>8.1f}")
+
+    # the files are dropped when the last client is closed
+    for view in views:
+        view.close()
+    assert signal_store.empty
+
+
+if __name__ == '__main__':
+    main()
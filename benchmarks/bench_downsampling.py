@@ -0,0 +1,59 @@
+# benchmark of the downsampled plot path against the raw px.line path
+# usage: python benchmarks/bench_downsampling.py [--scale 100] [--max-points 2000]
+#
+# payload = JSON sent to the browser for one plot, latency = figure build + JSON encode on the server
+# The render time in the browser (Plotly.newPlot) is NOT measured, it needs a headless browser. The payload is the
+# proxy for it: plotly.js parses and draws every point it receives.
+
+import argparse
+import json
+import time
+
+import plotly.express as px
+from plotly.utils import PlotlyJSONEncoder
+
+from common import CSV_DIR, load_scaled_log
+from downsampling import DEFAULT_MAX_POINTS
+from figure_builder import build_figure, get_trace_sources, refresh_figure_data
+from signal_store import FileBlock, SignalStore
+
+
+# function to measure time and payload size of building and encoding a figure
+def measure(build):
+    start = time.perf_counter()
+    fig = build()
+    payload = json.dumps(fig.to_plotly_json(), cls=PlotlyJSONEncoder)
+    return time.perf_counter() - start, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=100)
+    parser.add_argument('--max-points', type=int, default=DEFAULT_MAX_POINTS)
+    args = parser.parse_args()
+
+    print('server side only: latency = figure build + JSON encode, the browser render time is not measured')
+    print(f"{'file':<60} {'rows':>9} {'raw MB':>8} {'raw s':>7} {'down MB':>8} {'down s':>7} {'zoom s':>7}")
+    for path in sorted(CSV_DIR.glob('*.csv')):
+        df = load_scaled_log(path, args.scale)
+        y_columns = [col for col in df.columns if col != 'Time']
+
+        raw_time, raw_bytes = measure(lambda: px.line(df, x='Time', y=y_columns, template="plotly_white"))
+
+        signal_store = SignalStore()
+        signal_store.add(FileBlock.from_dataframe(path.name, df))
+        sources = get_trace_sources(signal_store, signal_store.keys())
+        down_time, down_bytes = measure(lambda: build_figure(sources, title=path.stem, max_points=args.max_points))
+
+        # zoom into the middle 10 % of the log, like a plotly_relayout event would
+        fig = build_figure(sources, title=path.stem, max_points=args.max_points)
+        t_min, t_max = df['Time'].iloc[0], df['Time'].iloc[-1]
+        x_range = (t_min + 0.45 * (t_max - t_min), t_min + 0.55 * (t_max - t_min))
+        zoom_time, _ = measure(lambda: (refresh_figure_data(fig, sources, x_range, args.max_points), fig)[1])
+
+        print(f'{path.stem[-60:]:<60} {len(df):>9} {raw_bytes / 1e6:>8.1f} {raw_time:>7.2f} '
+              f'{down_bytes / 1e6:>8.2f} {down_time:>7.2f} {zoom_time:>7.2f}')
+
+
+if __name__ == '__main__':
+    main()
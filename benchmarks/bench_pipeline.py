@@ -0,0 +1,147 @@
+# benchmark of the ingest -> figure -> push pipeline on synthetic logs in the csv_logs format
+# usage: python benchmarks/bench_pipeline.py [--rows 10000 100000 1000000 10000000] [--signals 10 100 2000]
+#                                            [--max-cells 2e7] [--cprofile]
+#
+# stages (the handlers of main.py which run them):
+#   ingest     = parse the csv into a FileBlock (handle_upload / load_csv_paths)
+#   build      = build the four plots with all signals selected (update_layout)
+#   visibility = deselect and select half of the signals on every plot (update_visibility)
+#   zoom       = reload the data of a 10 % window of plot 1 (on_zoom)
+# every log size runs in its own process, so the peak RSS of a stage is not hidden by an earlier, larger run.
+# sent = bytes of the figure JSON and plotly.js calls which the browser would receive.
+# The synthetic logs are written once to --data-dir and reused, logs above --max-cells (rows * signals) are skipped.
+
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from common import FakeClient, FakePlot, get_rss, write_synthetic_log
+from client_view import ClientView
+from ingest import read_csv_block
+from signal_store import SignalStore
+
+STAGES = ['ingest', 'build', 'visibility', 'zoom']
+RSS_SAMPLE_SECONDS = 0.005
+
+
+# samples the resident memory in a background thread to get the peak of a stage
+class PeakRss:
+    def __enter__(self):
+        self.peak = get_rss()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._done.wait(RSS_SAMPLE_SECONDS):
+            self.peak = max(self.peak, get_rss())
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, get_rss())
+
+
+# function to run one stage and measure wall time, peak RSS and sent bytes
+def run_stage(name, func, client, profile):
+    profiler = cProfile.Profile() if profile else None
+    bytes_before = client.bytes_sent
+    with PeakRss() as rss:
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        func()
+        if profiler:
+            profiler.disable()
+        seconds = time.perf_counter() - start
+
+    if profiler:
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(15)
+        print(f'--- {name} ---\n{stream.getvalue()}', file=sys.stderr)
+    return {'seconds': seconds, 'peak_rss': rss.peak, 'bytes_sent': client.bytes_sent - bytes_before}
+
+
+# function to run all stages on one synthetic log (in a child process)
+def run_pipeline(path, profile):
+    signal_store = SignalStore()
+    view = ClientView(0, signal_store, lambda fig: fig)
+    view.client = FakeClient()
+    for plot_view in view.plot_views:
+        plot_view.plot = FakePlot(view.client)
+    results = {}
+
+    def ingest():
+        signal_store.add(read_csv_block(str(path), path.name))
+        view.sync_signals()
+
+    def build():
+        for plot_view in view.plot_views:
+            plot_view.build(view.df_signals)
+
+    def visibility():
+        half = view.df_signals.index[::2]
+        for value in (False, True):
+            view.df_signals.loc[half, ['plot1', 'plot2', 'plot3', 'plot4']] = value
+            for plot_view in view.plot_views:
+                plot_view.sync_selection(view.df_signals)
+
+    def zoom():
+        time_axis = signal_store.block(path.name).time
+        duration = time_axis[-1] - time_axis[0]
+        start = time_axis[0] + 0.45 * duration
+        view.plot_views[0].set_x_range((start, start + 0.1 * duration))
+
+    for name, func in zip(STAGES, [ingest, build, visibility, zoom]):
+        results[name] = run_stage(name, func, view.client, profile)
+    return results
+
+
+# function to run the pipeline of one log size in a fresh process
+def run_child(path, profile):
+    command = [sys.executable, __file__, '--child', str(path)] + (['--cprofile'] if profile else [])
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--signals', type=int, nargs='+', default=[10, 100, 2000])
+    parser.add_argument('--max-cells', type=float, default=2e7, help='skip logs with more rows * signals')
+    parser.add_argument('--data-dir', type=Path, default=Path(tempfile.gettempdir()) / 'plotting_bench')
+    parser.add_argument('--cprofile', action='store_true', help='print the top functions of every stage')
+    parser.add_argument('--child', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_pipeline(args.child, args.cprofile)))
+        return
+
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+    print(f"{'rows':>9} {'signals':>7} {'csv MB':>7} " + ' '.join(f"{stage + ' s':>13} {'MB':>6} {'sent MB':>7}" for stage in STAGES))
+    for n_rows in args.rows:
+        for n_signals in args.signals:
+            if n_rows * n_signals > args.max_cells:
+                continue
+            path = args.data_dir / f'synthetic_{n_rows}x{n_signals}.csv'
+            if not path.exists():
+                write_synthetic_log(path, n_rows, n_signals)
+
+            results = run_child(path, args.cprofile)
+            columns = ' '.join(f"{results[stage]['seconds']:>13.3f} {results[stage]['peak_rss'] / 1e6:>6.0f} "
+                               f"{results[stage]['bytes_sent'] / 1e6:>7.2f}" for stage in STAGES)
+            print(f'{n_rows:>9} {n_signals:>7} {path.stat().st_size / 1e6:>7.0f} {columns}', flush=True)
+
+
+if __name__ == '__main__':
+    main()
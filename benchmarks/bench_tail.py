@@ -0,0 +1,124 @@
+# benchmark of the live tail: a writer process appends rows to a csv log at a fixed rate (like a running simulation,
+# the chunks end inside a line) while the reader follows it like main.py does (poll, add to the store, extend the
+# traces of the four plots) every TAIL_REFRESH_SECONDS.
+# usage: python benchmarks/bench_tail.py [--rate 100000] [--signals 20] [--seconds 10] [--window 1000000]
+#
+# poll ms = time of a poll with new rows (parse the appended bytes and update the plots),
+# lag = rows written but not shown yet after a poll, sent = bytes of the extendTraces calls which the browser receives.
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from common import FakeClient, FakePlot, write_synthetic_log
+from client_view import ClientView
+from signal_store import SignalStore
+from tail import CsvTail
+
+TAIL_REFRESH_SECONDS = 0.2  # as in main.py
+WRITE_SECONDS = 0.01  # the writer appends a chunk every 10 ms
+
+
+# copies a pre-generated log to the followed file at the given rate of rows, in chunks which end inside a line
+# runs in its own process like a simulation, so it does not compete with the reader for the GIL
+class LogWriter(multiprocessing.Process):
+    def __init__(self, source, path, rate):
+        super().__init__(daemon=True)
+        self.source, self.path, self.rate = source, path, rate
+        self.written = multiprocessing.Value('q', 0)
+        self.done = multiprocessing.Event()
+
+    @property
+    def rows_written(self):
+        return self.written.value
+
+    def run(self):
+        data = self.source.read_bytes()
+        header_end = data.index(b'\n') + 1
+        bytes_per_row = (len(data) - header_end) / max(data.count(b'\n') - 1, 1)
+        with open(self.path, 'wb') as csv_file:
+            csv_file.write(data[:header_end])
+            offset = header_end
+            start = time.perf_counter()
+            while offset < len(data):
+                end = min(header_end + int(self.rate * bytes_per_row * (time.perf_counter() - start)), len(data))
+                if end > offset:
+                    csv_file.write(data[offset:end])
+                    csv_file.flush()
+                    self.written.value += data.count(b'\n', offset, end)
+                    offset = end
+                time.sleep(WRITE_SECONDS)
+        self.done.set()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rate', type=int, default=100_000, help='rows written per second')
+    parser.add_argument('--signals', type=int, default=20)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--window', type=int, default=1_000_000, help='samples kept per followed file')
+    args = parser.parse_args()
+
+    data_dir = Path(tempfile.gettempdir()) / 'plotting_bench'
+    data_dir.mkdir(parents=True, exist_ok=True)
+    n_rows = int(args.rate * args.seconds)
+    source = data_dir / f'synthetic_{n_rows}x{args.signals}.csv'
+    if not source.exists():
+        write_synthetic_log(source, n_rows, args.signals, time_step=1e-5)
+
+    path = data_dir / 'tail.csv'
+    path.unlink(missing_ok=True)
+    writer = LogWriter(source, path, args.rate)
+    writer.start()
+    while not path.exists():
+        time.sleep(0.01)
+
+    signal_store = SignalStore()
+    view = ClientView(0, signal_store, lambda fig: fig)
+    view.client = FakeClient()
+    for plot_view in view.plot_views:
+        plot_view.plot = FakePlot(view.client)
+    tail = CsvTail(path, window_rows=args.window)
+
+    poll_seconds, lags = [], []
+    bytes_built = 0
+    while True:
+        finished = writer.done.is_set()
+        start = time.perf_counter()
+        n_new, _ = tail.poll()
+        if n_new:
+            first = tail.csv_filename not in signal_store.filenames
+            signal_store.add(tail.block())
+            if first:
+                view.sync_signals()
+                view.df_signals[['plot1', 'plot2', 'plot3', 'plot4']] = True
+                for plot_view in view.plot_views:
+                    plot_view.build(view.df_signals)
+                bytes_built = view.client.bytes_sent
+            else:
+                for plot_view in view.plot_views:
+                    plot_view.extend_file(tail.csv_filename, n_new)
+        if n_new:
+            poll_seconds.append(time.perf_counter() - start)
+        lags.append(writer.rows_written - tail.rows_read)
+        if finished and tail.rows_read == writer.rows_written:
+            break
+        time.sleep(max(TAIL_REFRESH_SECONDS - (time.perf_counter() - start), 0))
+
+    poll_ms = np.array(poll_seconds) * 1000
+    print(f'rows written {writer.rows_written} ({writer.rows_written / args.seconds:.0f}/s), rows read {tail.rows_read}, '
+          f'window {len(tail)}, file {path.stat().st_size / 1e6:.0f} MB')
+    print(f'poll ms: median {np.median(poll_ms):.1f}, p95 {np.percentile(poll_ms, 95):.1f}, max {poll_ms.max():.1f}')
+    print(f'lag rows: median {np.median(lags):.0f}, max {max(lags)}')
+    print(f'sent MB/s after the first build: {(view.client.bytes_sent - bytes_built) / 1e6 / args.seconds:.2f}')
+    if tail.rows_read != writer.rows_written:
+        raise SystemExit('not all rows were read')
+    path.unlink()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# benchmark of the trace data transport: plain JSON lists against base64 typed arrays
+# usage: python benchmarks/bench_transport.py [--scale 100] [--full-resolution]
+#
+# payload = JSON of one figure with all signals of a log, encode = server time from go.Figure to the JSON string
+# (the JSON text of the plain path is what ui.plotly sends for a go.Figure)
+
+import argparse
+import time
+
+import orjson
+
+from common import CSV_DIR, load_scaled_log
+from downsampling import DEFAULT_MAX_POINTS
+from figure_builder import build_figure, get_trace_sources
+from plot_client import encode_figure
+from signal_store import FileBlock, SignalStore
+
+
+# function to measure time and payload size of encoding a figure for the browser
+def measure(fig, binary):
+    start = time.perf_counter()
+    payload = orjson.dumps(encode_figure(fig, binary), option=orjson.OPT_SERIALIZE_NUMPY)
+    return time.perf_counter() - start, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=100)
+    parser.add_argument('--full-resolution', action='store_true', help='send every sample instead of the downsampled traces')
+    args = parser.parse_args()
+    max_points = 10 ** 12 if args.full_resolution else DEFAULT_MAX_POINTS
+
+    print(f"{'file':<60} {'rows':>9} {'json MB':>8} {'json s':>7} {'binary MB':>9} {'binary s':>8}")
+    for path in sorted(CSV_DIR.glob('*.csv')):
+        signal_store = SignalStore()
+        signal_store.add(FileBlock.from_dataframe(path.name, load_scaled_log(path, args.scale)))
+        fig = build_figure(get_trace_sources(signal_store, signal_store.keys()), title=path.stem, max_points=max_points)
+
+        json_time, json_bytes = measure(fig, binary=False)
+        binary_time, binary_bytes = measure(fig, binary=True)
+
+        print(f'{path.stem[-60:]:<60} {len(signal_store.block(path.name)):>9} {json_bytes / 1e6:>8.2f} {json_time:>7.3f} '
+              f'{binary_bytes / 1e6:>9.2f} {binary_time:>8.3f}')
+
+
+if __name__ == '__main__':
+    main()
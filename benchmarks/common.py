@@ -0,0 +1,77 @@
+# shared helpers of the benchmark scripts
+
+import itertools
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import orjson
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+CSV_DIR = ROOT_DIR / 'csv_logs'
+
+# make the application modules importable (main.py itself starts the app and is not imported)
+sys.path.insert(0, str(ROOT_DIR))
+
+from plot_client import encode_figure  # noqa: E402 (needs the path above)
+
+
+# function to load a sample log and repeat it scale times along the time axis
+def load_scaled_log(path, scale):
+    df = pd.read_csv(path, delimiter=';')
+    df = df[[col for col in df.columns if 'Unnamed' not in col]]
+    time_step = df['Time'].iloc[-1] - df['Time'].iloc[0] + (df['Time'].iloc[1] - df['Time'].iloc[0])
+    scaled = pd.concat([df] * scale, ignore_index=True)
+    scaled['Time'] = np.tile(df['Time'].to_numpy(), scale) + np.repeat(np.arange(scale) * time_step, len(df))
+    return scaled
+
+
+# function to get the resident memory of the process in bytes
+def get_rss():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        with open('/proc/self/statm') as statm:  # Linux without psutil
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+# function to write a synthetic log in the csv_logs format ('Time;signal;...;' with a trailing ';'), in chunks
+# the signals are sines with noise and one on/off flag, with the 6 significant digits of the simulation logs
+def write_synthetic_log(path, n_rows, n_signals, time_step=1.125e-3, chunk_rows=200_000, seed=0):
+    rng = np.random.default_rng(seed)
+    frequencies = rng.uniform(0.5, 50.0, n_signals)
+    columns = ['Time'] + [f'signal_{i}' for i in range(n_signals)] + ['']  # the empty column writes the trailing ';'
+    with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+        for start in range(0, n_rows, chunk_rows):
+            time = (np.arange(start, min(start + chunk_rows, n_rows)) + 1) * time_step
+            values = np.sin(np.outer(time, 2 * np.pi * frequencies)) + 0.01 * rng.standard_normal((len(time), n_signals))
+            values[:, -1] = values[:, -1] > 0  # like output.limit_active
+            df = pd.DataFrame(values, columns=columns[1:-1])
+            df.insert(0, 'Time', time)
+            df[''] = np.nan
+            df.to_csv(csv_file, sep=';', index=False, header=start == 0, float_format='%.6g', lineterminator='\n')
+
+
+# stand-in for the nicegui client of a browser tab, counts the bytes sent to the browser
+class FakeClient:
+    def __init__(self):
+        self.bytes_sent = 0
+
+    def run_javascript(self, code):
+        self.bytes_sent += len(code)
+
+
+# stand-in for a ui.plotly element
+class FakePlot:
+    ids = itertools.count()
+
+    def __init__(self, client):
+        self.client = client
+        self.id = next(FakePlot.ids)
+
+    def update_figure(self, figure):
+        self.figure = figure
+        self.client.bytes_sent += len(orjson.dumps(encode_figure(figure), option=orjson.OPT_SERIALIZE_NUMPY))
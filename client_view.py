@@ -0,0 +1,101 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from downsampling import DEFAULT_MAX_POINTS
+from plot_view import PlotView
+
+PLOT_COLUMNS = ['plot1', 'plot2', 'plot3', 'plot4']
+
+
+# view state of one browser client (tab or window): the signals table with the plot selections, the plots with their
+# zoom, the layout and the running uploads. The signal data is not copied, all clients read the shared signal store.
+class ClientView:
+    def __init__(self, client_id, signal_store, customize, max_points=DEFAULT_MAX_POINTS):
+        self.client_id = client_id
+        self.signal_store = signal_store
+        self.df_signals = pd.DataFrame(columns=['csv_filename', 'signal_name', *PLOT_COLUMNS])  # dataframe to store signal settings
+        self.signal_rows = {}  # index of df_signals: (csv_filename, signal_name) -> row position
+        self.filenames = set()  # files of the signal store which are listed in df_signals
+
+        # the plots take only the selected signals from the store, when they are shown the first time
+        self.plot_views = [PlotView(f'plot{i}', f'Plot {i}', signal_store, customize, max_points) for i in range(1, 5)]
+
+        self.upload_progress = {}  # csv_filename -> parsed fraction of the uploads of this client which are currently parsed
+        self.upload_cancel_event = threading.Event()  # set to cancel the running uploads of this client
+        self.left_drawer_state = True
+
+        # elements of the page, set when the page is created
+        self.client = None
+        self.grid = None
+        self.sync_checkboxes = []
+        self.upload_progress_bar = None
+        self.upload_progress_label = None
+        self.cache_label = None
+        self.update_layout = None
+
+    # function to add the signals of the store which are not listed yet to df_signals, with all plots selected
+    # a re-uploaded file keeps the signal settings of its rows, the new rows are appended at the end
+    def sync_signals(self):
+        new_keys = [key for key in self.signal_store.keys() if key not in self.signal_rows]
+        new_filenames = set(self.signal_store.filenames) - self.filenames
+        self.signal_store.acquire(new_filenames)
+        self.filenames |= new_filenames
+        if not new_keys:
+            return
+
+        # Create a new dataframe with signal names, filename, and default settings
+        new_signals_df = pd.DataFrame({
+            'csv_filename': [csv_filename for csv_filename, _ in new_keys],
+            'signal_name': [signal_name for _, signal_name in new_keys],
+            'plot1': True,
+            'plot2': True,
+            'plot3': True,
+            'plot4': True, # die linie macht de plot 4 uf true, wenn de csv file hochglade wird
+        })
+
+        # Update the df_signals dataframe and its index
+        start = len(self.df_signals)
+        self.df_signals = pd.concat([self.df_signals, new_signals_df], ignore_index=True)
+        self.signal_rows.update({key: start + i for i, key in enumerate(new_keys)})
+
+    # function to build the aggrid rows for the given row positions of df_signals (default: all rows)
+    # the row position is used as aggrid row id, so single rows can be updated with transactions
+    def get_grid_rows(self, positions=None):
+        df = self.df_signals if positions is None else self.df_signals.iloc[positions]
+        rows = df.to_dict(orient='records')
+        for position, row in zip(df.index, rows):
+            row['row_id'] = str(position)
+        return rows
+
+    # function to set plot columns of the given rows of df_signals to true or false
+    # only the rows which changed are sent to the grid, with one transaction
+    def set_rows_value(self, positions, columns, value):
+        df_signals = self.df_signals
+        positions = np.asarray(positions, dtype=np.int64)
+        column_positions = [df_signals.columns.get_loc(column) for column in columns]
+
+        # vectorized update of all rows at once
+        current = df_signals.iloc[positions, column_positions].to_numpy(dtype=bool)
+        changed = positions[(current != value).any(axis=1)]
+        if not len(changed):
+            return
+        df_signals.iloc[changed, column_positions] = value
+
+        # keep the server side rowData in sync (in place), so a later grid.update() does not restore old values
+        row_data = self.grid.options['rowData']
+        for position in changed:
+            for column in columns:
+                row_data[position][column] = value
+        self.grid.run_grid_method('applyTransaction', {'update': [row_data[position] for position in changed]})
+
+    # function to release the files and the figures of the client when its page is closed
+    # returns the names of the files which were dropped from the store because no client shows them anymore
+    def close(self):
+        dropped = self.signal_store.release(self.filenames)
+        self.filenames = set()
+        for plot_view in self.plot_views:
+            plot_view.fig = None
+        self.upload_cancel_event.set()
+        return dropped
@@ -0,0 +1,244 @@
+import ast
+import re
+import threading
+
+import numpy as np
+
+from signal_store import to_signal_array
+
+QUOTED_NAME = re.compile(r'`([^`]+)`')  # signal names with spaces or operators are quoted, e.g. `DC link current`
+
+
+# function to get the sums of all windows of n samples, the first n - 1 samples have no full window and are NaN
+def rolling_sum(x, n):
+    n = int(n)
+    if n < 1:
+        raise ValueError('the window has to be at least 1 sample')
+    cumsum = np.cumsum(np.asarray(x, dtype=np.float64 if not np.iscomplexobj(x) else np.complex128))
+    sums = np.full(len(cumsum), np.nan, dtype=cumsum.dtype)
+    if n <= len(cumsum):
+        sums[n - 1] = cumsum[n - 1]
+        sums[n:] = cumsum[n:] - cumsum[:-n]
+    return sums
+
+
+# function to get the mean of the last n samples
+def rolling_mean(x, n):
+    return rolling_sum(x, n) / int(n)
+
+
+# function to get the root mean square of the last n samples
+def rolling_rms(x, n):
+    x = np.asarray(x, dtype=np.float64)
+    return np.sqrt(np.maximum(rolling_mean(x * x, n), 0.0))
+
+
+# function to get the standard deviation of the last n samples
+def rolling_std(x, n):
+    x = np.asarray(x, dtype=np.float64)
+    mean = rolling_mean(x, n)
+    return np.sqrt(np.maximum(rolling_mean(x * x, n) - mean * mean, 0.0))
+
+
+# function to get the share of the last n samples which are not zero, e.g. the duty ratio of output.limit_active
+def duty(x, n):
+    return rolling_mean(np.asarray(x) != 0, n)
+
+
+# function to get the difference to the previous sample (NaN for the first sample)
+def diff(x):
+    return np.concatenate(([np.nan], np.diff(np.asarray(x, dtype=np.float64))))
+
+
+# function to get the amplitude of one frequency over the last n samples (sliding DFT of a single bin)
+# e.g. the 50 Hz component of a steady-state current, the result stays on the time axis of the file
+def fft_amplitude(x, time, frequency, n):
+    phasor = np.asarray(x, dtype=np.float64) * np.exp(-2j * np.pi * frequency * np.asarray(time, dtype=np.float64))
+    return np.abs(rolling_sum(phasor, n)) * 2 / int(n)
+
+
+# functions which can be used in expressions, all work on whole columns
+EXPRESSION_FUNCTIONS = {
+    'abs': np.abs, 'sqrt': np.sqrt, 'exp': np.exp, 'log': np.log, 'log10': np.log10,
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'arctan2': np.arctan2, 'sign': np.sign,
+    'floor': np.floor, 'ceil': np.ceil, 'round': np.round, 'clip': np.clip, 'where': np.where,
+    'minimum': np.minimum, 'maximum': np.maximum, 'mean': np.nanmean, 'rms': lambda x: np.sqrt(np.nanmean(np.square(x))),
+    'cumsum': np.cumsum, 'gradient': np.gradient, 'diff': diff,
+    'rolling_sum': rolling_sum, 'rolling_mean': rolling_mean, 'rolling_rms': rolling_rms, 'rolling_std': rolling_std,
+    'duty': duty, 'fft_amplitude': fft_amplitude,
+    'pi': np.pi,
+}
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Constant, ast.Name, ast.Load, ast.keyword,
+    ast.operator, ast.unaryop, ast.cmpop,
+)
+
+
+# function to get the dotted name of a Name/Attribute chain (e.g. input.control_angle_pu), None for other nodes
+def get_dotted_name(node):
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        prefix = get_dotted_name(node.value)
+        return None if prefix is None else f'{prefix}.{node.attr}'
+    return None
+
+
+# replaces the signal names of an expression with variables and rejects everything but arithmetic and function calls
+class ExpressionParser(ast.NodeTransformer):
+    def __init__(self, signal_names):
+        self.signal_names = signal_names
+        self.inputs = {}  # signal_name -> variable name
+
+    def variable(self, signal_name):
+        if signal_name not in self.inputs:
+            self.inputs[signal_name] = f'_signal_{len(self.inputs)}'
+        return ast.Name(id=self.inputs[signal_name], ctx=ast.Load())
+
+    def visit_Attribute(self, node):
+        signal_name = get_dotted_name(node)
+        if signal_name not in self.signal_names:
+            raise ValueError(f"unknown signal '{signal_name}'")
+        return self.variable(signal_name)
+
+    def visit_Name(self, node):
+        if node.id in self.signal_names:
+            return self.variable(node.id)
+        if node.id in EXPRESSION_FUNCTIONS or node.id == 'time':
+            return node
+        raise ValueError(f"unknown signal or function '{node.id}'")
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in EXPRESSION_FUNCTIONS:
+            raise ValueError(f"unknown function '{ast.unparse(node.func)}'")
+        node.args = [self.visit_argument(arg) for arg in node.args]
+        for keyword in node.keywords:
+            keyword.value = self.visit_argument(keyword.value)
+        return node
+
+    # a number passed directly to a function stays as it is (e.g. the window of rolling_mean or the decimals of round)
+    def visit_argument(self, node):
+        return node if isinstance(node, ast.Constant) else self.visit(node)
+
+    # numbers in arithmetic are floats, integer arithmetic of constants (e.g. 9**9**8) would hold the GIL for minutes
+    def visit_Constant(self, node):
+        if isinstance(node.value, int) and not isinstance(node.value, bool):
+            return ast.copy_location(ast.Constant(value=float(node.value)), node)
+        return node
+
+    def generic_visit(self, node):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"'{ast.unparse(node)}' is not supported in expressions")
+        return super().generic_visit(node)
+
+
+# function to compile an expression over the given signal names, returns the code and the used signal names
+def parse_expression(expression, signal_names):
+    quoted = {}
+
+    def quote(match):
+        quoted[f'_quoted_{len(quoted)}'] = match.group(1)
+        return f'_quoted_{len(quoted) - 1}'
+
+    tree = ast.parse(QUOTED_NAME.sub(quote, expression.strip()), mode='eval')
+    parser = ExpressionParser(set(signal_names) | set(quoted))
+    tree = ast.fix_missing_locations(parser.visit(tree))
+    inputs = {quoted.get(signal_name, signal_name): variable for signal_name, variable in parser.inputs.items()}
+    unknown = [signal_name for signal_name in inputs if signal_name not in signal_names]
+    if unknown:
+        raise ValueError(f"unknown signal '{unknown[0]}'")
+    return compile(tree, '<expression>', 'eval'), inputs
+
+
+# function to evaluate an expression over the signals of a file, vectorized over the whole columns
+def evaluate_expression(expression, time, signals):
+    code, inputs = parse_expression(expression, signals)
+    namespace = {'__builtins__': {}, **EXPRESSION_FUNCTIONS, 'time': time}
+    namespace.update({variable: signals[signal_name] for signal_name, variable in inputs.items()})
+    with np.errstate(all='ignore'):
+        values = np.asarray(eval(code, namespace), dtype=np.float64)
+    if values.ndim == 0:
+        values = np.full(len(time), float(values))  # e.g. mean(x)
+    if values.shape != (len(time),):
+        raise ValueError(f'the expression has to give one value per sample, not {values.shape}')
+    return to_signal_array(values), list(inputs)
+
+
+# derived signals of the loaded files, defined by expressions over the signals of the same file
+# the results are cached by expression and input version (the version of the parsed file and the expressions of the
+# derived signals used as input), a re-uploaded file gets a new version and its derived signals are evaluated again
+class DerivedSignals:
+    def __init__(self):
+        self.definitions = {}  # csv_filename -> {signal_name: expression}, in definition order
+        self._cache = {}  # (csv_filename, cache key) -> values
+        self._lock = threading.RLock()  # signals are defined and evaluated in worker threads
+        self.evaluations = 0
+
+    # function to check if a signal is a derived signal
+    def __contains__(self, key):
+        csv_filename, signal_name = key
+        return signal_name in self.definitions.get(csv_filename, {})
+
+    # function to add (or change) a derived signal, the expression is evaluated before it is added
+    # returns the block of the file with all its derived signals
+    def define(self, block, signal_name, expression):
+        with self._lock:  # apply may run for another file in another worker thread (e.g. an upload)
+            definitions = self.definitions.setdefault(block.csv_filename, {})
+            if signal_name in block.signals and signal_name not in definitions:
+                raise ValueError(f"'{signal_name}' is already a signal of {block.csv_filename}")
+
+            previous = definitions.get(signal_name)
+            definitions[signal_name] = expression
+            try:
+                return self.apply(block, strict=signal_name)
+            except Exception:
+                # keep the old definition if the new expression is invalid
+                if previous is None:
+                    del definitions[signal_name]
+                else:
+                    definitions[signal_name] = previous
+                raise
+
+    # function to remove the derived signals of files which were dropped from the signal store
+    def remove(self, csv_filenames):
+        with self._lock:
+            for csv_filename in csv_filenames:
+                self.definitions.pop(csv_filename, None)
+            self._cache = {cache_key: values for cache_key, values in self._cache.items() if cache_key[0] not in csv_filenames}
+
+    # function to get a block with the derived signals of its file, only new or changed expressions are evaluated
+    # derived signals which can not be evaluated (e.g. an input is missing in a re-uploaded file) are left out,
+    # errors of the strict signal are raised
+    def apply(self, block, strict=None):
+        definitions = self.definitions.get(block.csv_filename)
+        if not definitions:
+            return block
+
+        with self._lock:
+            signals = {signal_name: values for signal_name, values in block.signals.items() if signal_name not in definitions}
+            keys = {}  # signal_name -> cache key of the derived signals evaluated so far
+            for signal_name, expression in definitions.items():
+                try:
+                    signals[signal_name] = self._evaluate(block, signals, signal_name, expression, keys)
+                except (ValueError, SyntaxError, TypeError, ArithmeticError):
+                    if signal_name == strict:
+                        raise
+
+            # drop the results of older versions of the file and of changed expressions
+            used = {(block.csv_filename, key) for key in keys.values()}
+            for cache_key in [cache_key for cache_key in self._cache if cache_key[0] == block.csv_filename]:
+                if cache_key not in used:
+                    del self._cache[cache_key]
+        return block.with_signals(signals)
+
+    # function to get the values of a derived signal from the cache or evaluate them
+    # the key holds the version of the file and the keys of the derived signals which are used as input
+    def _evaluate(self, block, signals, signal_name, expression, keys):
+        _, inputs = parse_expression(expression, signals)
+        key = (block.version, expression, tuple(keys.get(input_name) for input_name in inputs))
+        cache_key = (block.csv_filename, key)
+        if cache_key not in self._cache:
+            self._cache[cache_key], _ = evaluate_expression(expression, block.time, signals)
+            self.evaluations += 1
+        keys[signal_name] = key
+        return self._cache[cache_key]
@@ -0,0 +1,60 @@
+import numpy as np
+
+DEFAULT_MAX_POINTS = 2000  # maximum number of points per trace sent to the browser
+
+
+# function to get the slice of samples inside the visible x-range (x has to be sorted ascending)
+def visible_slice(x, x_range=None):
+    if x_range is None:
+        return slice(0, len(x))
+
+    start = int(np.searchsorted(x, x_range[0], side='left'))
+    end = int(np.searchsorted(x, x_range[1], side='right'))
+
+    # keep one extra sample on each side, so the lines continue to the plot border
+    return slice(max(start - 1, 0), min(end + 1, len(x)))
+
+
+# function to reduce a trace to the min and max sample of equally sized buckets, keeps all spikes
+def minmax_downsample(x, y, max_points=DEFAULT_MAX_POINTS):
+    n = len(y)
+    if n <= max_points:
+        return x, y
+
+    # every bucket contributes two points (min and max)
+    n_buckets = max(max_points // 2, 1)
+    bucket_size = -(-n // n_buckets)  # ceil division
+    n_buckets = -(-n // bucket_size)
+
+    # pad the values to a full rectangle, padded and NaN samples never win min/max
+    padded = np.full(n_buckets * bucket_size, np.nan, dtype=np.float64)
+    padded[:n] = y
+    padded = padded.reshape(n_buckets, bucket_size)
+    nan_mask = np.isnan(padded)
+
+    offsets = np.arange(n_buckets) * bucket_size
+    idx_min = np.where(nan_mask, np.inf, padded).argmin(axis=1) + offsets
+    idx_max = np.where(nan_mask, -np.inf, padded).argmax(axis=1) + offsets
+
+    # always keep first and last sample, so the x-extent of the trace is unchanged
+    idx = np.unique(np.concatenate((idx_min, idx_max, [0, n - 1])))
+    idx = idx[idx < n]
+    return x[idx], y[idx]
+
+
+# function to get the downsampled trace for the visible x-range
+def downsample(x, y, x_range=None, max_points=DEFAULT_MAX_POINTS):
+    window = visible_slice(x, x_range)
+    return minmax_downsample(x[window], y[window], max_points)
+
+
+# function to extract the new x-range from plotly_relayout event data
+# returns (True, (start, end)) for a zoom, (True, None) for a reset and (False, None) if the x-axis was not changed
+def get_relayout_x_range(relayout_data):
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return True, (relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]'])
+    if 'xaxis.range' in relayout_data:
+        return True, tuple(relayout_data['xaxis.range'])
+    if 'xaxis.autorange' in relayout_data:
+        return True, None
+    return False, None
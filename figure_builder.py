@@ -0,0 +1,72 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from downsampling import DEFAULT_MAX_POINTS, downsample, visible_slice
+
+EMPTY_SOURCE = (np.zeros(0), np.zeros(0))
+WEBGL_POINT_THRESHOLD = 100_000  # visible points per figure above which the traces are drawn with WebGL instead of SVG
+RENDER_MODES = {'auto': 'Auto', 'svg': 'SVG', 'webgl': 'WebGL'}  # render mode -> label, auto: WebGL above WEBGL_POINT_THRESHOLD
+
+
+# function to collect the (key, time, values) sources of the given (csv_filename, signal_name) keys from the signal store
+# signals which are missing in a re-uploaded file are shown empty
+def get_trace_sources(signal_store, keys):
+    return [(key, *(signal_store.get(key) if key in signal_store else EMPTY_SOURCE)) for key in keys]
+
+
+# function to count the points which the downsampled traces of the sources will have, without downsampling them
+def count_points(trace_sources, x_range=None, max_points=DEFAULT_MAX_POINTS):
+    total = 0
+    for _, x, _ in trace_sources:
+        window = visible_slice(x, x_range)
+        total += min(window.stop - window.start, max_points)
+    return total
+
+
+# function to decide if a figure with the given number of visible points is drawn with WebGL
+def use_webgl(n_points, render_mode='auto'):
+    if render_mode == 'auto':
+        return n_points > WEBGL_POINT_THRESHOLD
+    return render_mode == 'webgl'
+
+
+# function to create the downsampled line trace of a signal, drawn with WebGL (scattergl) or SVG (scatter)
+def make_trace(key, x, y, x_range=None, max_points=DEFAULT_MAX_POINTS, webgl=False):
+    csv_filename, signal_name = key
+    x_visible, y_visible = downsample(x, y, x_range, max_points)
+    trace_type = go.Scattergl if webgl else go.Scatter
+    # traces are grouped by file in the legend, signals with the same name in different files stay distinguishable
+    return trace_type(x=x_visible, y=y_visible, name=signal_name, mode='lines',
+                      legendgroup=csv_filename, legendgrouptitle_text=csv_filename)
+
+
+# function to create a figure with one downsampled line trace per source
+def build_figure(trace_sources, title, x_range=None, max_points=DEFAULT_MAX_POINTS, webgl=False):
+    fig = go.Figure(layout=dict(title=title, template="plotly_white", xaxis_title='Time', yaxis_title='value'))
+    fig.add_traces([make_trace(key, x, y, x_range, max_points, webgl) for key, x, y in trace_sources])
+    if x_range is not None:
+        fig.update_xaxes(range=list(x_range))
+    return fig
+
+
+# function to replace the trace data of a figure with the downsampled data for a new x-range
+def refresh_figure_data(fig, trace_sources, x_range=None, max_points=DEFAULT_MAX_POINTS):
+    with fig.batch_update():
+        for trace, (_, x, y) in zip(fig.data, trace_sources):
+            trace.x, trace.y = downsample(x, y, x_range, max_points)
+        if x_range is None:
+            fig.update_xaxes(range=None, autorange=True)
+        else:
+            fig.update_xaxes(range=list(x_range), autorange=False)
+
+
+# function to get a copy of a figure with all traces converted to WebGL (scattergl) or SVG (scatter)
+# data, visibility, line style and layout are kept
+def convert_traces(fig, webgl):
+    trace_type = go.Scattergl if webgl else go.Scatter
+    traces = []
+    for trace in fig.data:
+        properties = trace.to_plotly_json()
+        properties.pop('type', None)
+        traces.append(trace_type(properties))
+    return go.Figure(data=traces, layout=fig.layout)
@@ -0,0 +1,132 @@
+import glob
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from log_cache import LogCache, hash_stream
+from signal_store import TIME_COLUMN, FileBlock, is_signal_column
+
+CSV_DELIMITER = ';'
+CHUNK_ROWS = 50_000  # rows parsed per chunk, bounds the memory of the intermediate dataframe
+UPLOAD_SPOOL_BYTES = 16 * 1024 * 1024  # uploads up to this size are kept in memory, larger ones in a temporary file
+
+
+# raised inside the parser when an upload was cancelled by the user
+class IngestCancelled(Exception):
+    pass
+
+
+# function to check if a csv column is read at all (the trailing ';' of every line creates an empty 'Unnamed' column)
+def is_loaded_column(column_name):
+    return column_name == TIME_COLUMN or is_signal_column(column_name)
+
+
+# function to get the size of a seekable stream without changing its position
+def get_stream_size(stream):
+    try:
+        position = stream.tell()
+        size = stream.seek(0, 2)
+        stream.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+# function to parse a csv stream (or file path) chunk by chunk into a FileBlock
+# progress(fraction) is called after every chunk, setting cancel_event aborts the parse with IngestCancelled
+def read_csv_block(stream, csv_filename, progress=None, cancel_event=None, chunksize=CHUNK_ROWS):
+    is_path = isinstance(stream, (str, os.PathLike))
+    total_bytes = None if is_path else get_stream_size(stream)
+    columns = None
+    chunks = {}  # column -> list of float64 chunk arrays
+
+    # files on disk are memory-mapped instead of read into buffers
+    reader = pd.read_csv(stream, delimiter=CSV_DELIMITER, encoding='utf-8', chunksize=chunksize,
+                         usecols=is_loaded_column, memory_map=is_path)
+    with reader:
+        for chunk in reader:
+            if cancel_event is not None and cancel_event.is_set():
+                raise IngestCancelled(csv_filename)
+
+            if columns is None:
+                columns = [str(column) for column in chunk.columns]
+                chunks = {column: [] for column in columns}
+            for column in columns:
+                chunks[column].append(pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=np.float64))
+            del chunk
+
+            if progress is not None and total_bytes:
+                progress(min(stream.tell() / total_bytes, 1.0))
+
+    # join the chunks column by column and release them right away, so the peak stays near the size of the final arrays
+    time = None
+    signals = {}
+    for column in columns or []:
+        values = np.concatenate(chunks.pop(column))
+        if column == TIME_COLUMN:
+            time = values
+        else:
+            signals[column] = values
+
+    block = FileBlock.from_arrays(csv_filename, time, signals)
+    if progress is not None:
+        progress(1.0)
+    return block
+
+
+# function to get the file name and a seekable binary stream of an upload event
+# nicegui 2.x gives the stream as event.content, nicegui 3.x gives event.file, which is read chunk by chunk into a
+# spooled temporary file (so a large upload is not held in memory as one bytes object)
+async def open_upload(event):
+    if not hasattr(event, 'file'):
+        return event.name, event.content
+    stream = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    async for data in event.file.iterate():
+        stream.write(data)
+    stream.seek(0)
+    return event.file.name, stream
+
+
+# function to load a csv stream through the log cache, a known file is memory-mapped from the cache instead of parsed
+def load_csv_block(stream, csv_filename, progress=None, cancel_event=None, cache=None):
+    if cache is None:
+        return read_csv_block(stream, csv_filename, progress, cancel_event)
+
+    digest = hash_stream(stream)
+    block = cache.load(digest, csv_filename)
+    if block is None:
+        block = read_csv_block(stream, csv_filename, progress, cancel_event)
+        cache.store(digest, block)
+    elif progress is not None:
+        progress(1.0)
+    return block
+
+
+# function to find the csv files of a directory, a file path or a glob pattern (e.g. 'csv_logs/*Steady*.csv')
+def resolve_csv_paths(pattern):
+    path = Path(pattern).expanduser()
+    if path.is_dir():
+        return sorted(path.glob('*.csv'))
+    if path.is_file():
+        return [path]
+    return sorted(Path(match) for match in glob.glob(str(path), recursive=True)
+                  if match.lower().endswith('.csv') and os.path.isfile(match))
+
+
+# function to parse a csv file into the log cache, runs in a worker process so several files are parsed in parallel
+# only the cache digest is returned, the parsed arrays are memory-mapped from the cache instead of sent between processes
+# returns (digest, hit, block), the block is only sent back if it could not be cached, so it is never parsed twice
+def cache_csv_file(path, cache_dir, max_bytes):
+    cache = LogCache(cache_dir, max_bytes)
+    with open(path, 'rb') as stream:
+        digest = hash_stream(stream)
+    if cache.contains(digest):
+        return digest, True, None
+
+    block = read_csv_block(path, Path(path).name)
+    if cache.store(digest, block):
+        return digest, False, None
+    return digest, False, block
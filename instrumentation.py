@@ -0,0 +1,69 @@
+import functools
+import inspect
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+# opt-in timing of the event handlers, enabled with "python main.py --profile" or PLOTTING_PROFILE=1
+PROFILE = os.environ.get('PLOTTING_PROFILE', '') not in ('', '0')
+SLOW_EVENT_SECONDS = 0.1  # events above this time are logged as warnings
+
+logger = logging.getLogger('PlottingApplication.profile')
+
+
+# function to enable the per-event timing log at runtime
+def enable_profiling():
+    global PROFILE
+    PROFILE = True
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+if PROFILE:
+    enable_profiling()  # PLOTTING_PROFILE=1 logs every event like --profile
+
+
+# function to log the duration of an event
+def log_timing(name, seconds, detail=''):
+    level = logging.WARNING if seconds > SLOW_EVENT_SECONDS else logging.INFO
+    logger.log(level, '%-24s %9.1f ms %s', name, seconds * 1000, detail)
+
+
+# context manager to time a block of code, does nothing while profiling is disabled
+@contextmanager
+def timed(name, detail=''):
+    if not PROFILE:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        log_timing(name, time.perf_counter() - start, detail)
+
+
+# decorator to time every call of a function or coroutine function (e.g. an event handler)
+# the timing of a coroutine includes the time it waits for worker threads and processes
+def profiled(func):
+    name = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not PROFILE:
+                return await func(*args, **kwargs)
+            with timed(name):
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not PROFILE:
+            return func(*args, **kwargs)
+        with timed(name):
+            return func(*args, **kwargs)
+    return wrapper
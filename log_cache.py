@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from signal_store import FileBlock
+
+CACHE_DIR = Path(os.environ.get('PLOTTING_CACHE_DIR', Path.home() / '.cache' / 'PlottingApplication'))
+CACHE_MAX_BYTES = int(os.environ.get('PLOTTING_CACHE_MAX_BYTES', 4 * 1024 ** 3))  # evict least recently used logs above 4 GB
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+META_FILENAME = 'meta.json'
+
+
+# function to compute the content hash of a stream, the stream position is restored afterwards
+def hash_stream(stream):
+    position = stream.tell()
+    digest = hashlib.sha256()  # hardware accelerated on most CPUs
+    while chunk := stream.read(HASH_CHUNK_BYTES):
+        digest.update(chunk)
+    stream.seek(position)
+    return digest.hexdigest()
+
+
+# on-disk cache of parsed logs, keyed by the hash of the csv content
+# every entry is a directory with one .npy file per column, so a cached log is memory-mapped instead of parsed
+class LogCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # uploads are parsed in parallel worker threads
+
+    # function to check if a log is cached
+    def contains(self, digest):
+        return (self.cache_dir / digest / META_FILENAME).exists()
+
+    # function to open a cached log as FileBlock with memory-mapped arrays, None if the log is not cached
+    def open(self, digest, csv_filename):
+        entry = self.cache_dir / digest
+        try:
+            meta = json.loads((entry / META_FILENAME).read_text(encoding='utf-8'))
+            time = np.load(entry / 'time.npy', mmap_mode='r')
+            signals = {
+                signal_name: np.load(entry / f'signal_{i}.npy', mmap_mode='r')
+                for i, signal_name in enumerate(meta['signal_names'])
+            }
+            os.utime(entry / META_FILENAME)  # mark as recently used for the LRU eviction
+        except (OSError, ValueError, KeyError):
+            return None
+        return FileBlock(csv_filename, time, signals)
+
+    # function to load a cached log and count the lookup for the hit rate, None if the log is not cached
+    def load(self, digest, csv_filename):
+        block = self.open(digest, csv_filename)
+        self.record(block is not None)
+        return block
+
+    # function to count a cache lookup (also used for lookups done in worker processes)
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    # function to add a parsed log to the cache and evict the least recently used logs above the size limit
+    # returns False if the log is not cached (e.g. the cache directory is not writable or the log is larger than the cache)
+    def store(self, digest, block):
+        if block.nbytes > self.max_bytes:
+            return False
+        entry = self.cache_dir / digest
+        tmp_entry = self.cache_dir / f'tmp-{digest}-{os.getpid()}-{threading.get_ident()}'
+        try:
+            tmp_entry.mkdir(parents=True, exist_ok=True)
+            np.save(tmp_entry / 'time.npy', block.time)
+            for i, values in enumerate(block.signals.values()):
+                np.save(tmp_entry / f'signal_{i}.npy', values)
+            meta = {'csv_filename': block.csv_filename, 'signal_names': block.signal_names, 'nbytes': block.nbytes}
+            (tmp_entry / META_FILENAME).write_text(json.dumps(meta), encoding='utf-8')
+            os.replace(tmp_entry, entry)  # entries only appear complete
+        except OSError:
+            shutil.rmtree(tmp_entry, ignore_errors=True)  # e.g. the same log was stored by a parallel upload
+            return self.contains(digest)
+        self.evict()
+        return self.contains(digest)
+
+    # function to remove the least recently used entries until the cache fits into max_bytes
+    def evict(self):
+        with self._lock:
+            entries = []
+            for entry in self.cache_dir.iterdir():
+                try:
+                    size = sum(path.stat().st_size for path in entry.iterdir())
+                    entries.append(((entry / META_FILENAME).stat().st_mtime, size, entry))
+                except OSError:
+                    continue  # no complete entry (a file, a temp directory or removed by another process)
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    shutil.rmtree(entry)
+                    total -= size
+                except OSError:
+                    pass  # still memory-mapped (Windows), retried on the next eviction
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -1,51 +1,65 @@
-from nicegui import app, ui
-import pandas as pd
+from nicegui import app, context, run, ui
+import numpy as np
 import plotly.express as px
-from io import StringIO
+import argparse
+import asyncio
+from pathlib import Path
+from alignment import TimeAligner, is_aligned_filename
+from client_view import PLOT_COLUMNS, ClientView
+from derived_signals import EXPRESSION_FUNCTIONS, DerivedSignals
+from downsampling import get_relayout_x_range
+from figure_builder import RENDER_MODES
+from instrumentation import enable_profiling, profiled
+from ingest import IngestCancelled, cache_csv_file, load_csv_block, open_upload, read_csv_block, resolve_csv_paths
+from log_cache import LogCache
+from plot_client import EXTEND_TRACES_SCRIPT, X_SYNC_SCRIPT, EncodedPlotly, set_synced_plots, x_sync_handler
+from signal_store import SignalStore
+from tail import TAIL_WINDOW_ROWS, CsvTail
 
 # set native app settings
 app.native.window_args['resizable'] = True
 app.native.start_args['debug'] = False # open with debug window
 app.native.settings['ALLOW_DOWNLOADS'] = True
 
-df_global = pd.DataFrame()  # dataframe to store uploaded data
-df_signals = pd.DataFrame(columns=['csv_filename', 'signal_name', 'plot1', 'plot2', 'plot3', 'plot4'])  # dataframe to store signal settings
+# command line arguments, e.g. "python main.py csv_logs" or "python main.py 'csv_logs/*p0*.csv'"
+parser = argparse.ArgumentParser(description='PlottingApplication')
+parser.add_argument('paths', nargs='*', help='csv files, directories or glob patterns to load on start')
+parser.add_argument('--follow', action='append', default=[], help='csv file which is still being written, new samples are shown live (repeatable)')
+parser.add_argument('--profile', action='store_true', help='log the time of every event (also enabled by PLOTTING_PROFILE=1)')
+args, _ = parser.parse_known_args()
+if args.profile:
+    enable_profiling()
+
+signal_store = SignalStore()  # time-indexed signal arrays of every loaded file, keyed by (csv_filename, signal_name), shared by all clients
 processed_filenames = set()  # set to keep track of processed filenames
+log_cache = LogCache()  # parsed logs on disk, re-uploading a known file skips parsing
+derived_signals = DerivedSignals()  # expressions over the signals of a file, shown as ordinary signals
+time_aligner = TimeAligner()  # resamples several files to a common time base, cached per file set and resolution
+client_views = {}  # client id -> ClientView with the view state (selections, zoom, layout) of every open page
 
 left_drawer_state =  True # left drawer state on app start
+ZOOM_EVENT_THROTTLE = 0.1  # seconds, rapid zoom events are coalesced into the latest one
+TAIL_REFRESH_SECONDS = 0.2  # followed files are polled and their new samples are sent at most 5 times per second
+tail_tasks = {}  # csv_filename -> task which follows the file
 
-# function to handle CSV upload
-def handle_upload(event):
-    global df_global, df_signals, processed_filenames, grid
-
-    csv_filename = event.name  # get the filename of the uploaded CSV
-    content = event.content.read().decode('utf-8')
-    new_df = pd.read_csv(StringIO(content), delimiter=';')
-
-    # merge new data with existing global dataframe
-    df_global = pd.concat([df_global, new_df], ignore_index=True)
-
-    # Create a new dataframe with signal names, filename, and default settings
-    new_signals_df = pd.DataFrame({
-        'csv_filename': [csv_filename] * len(new_df.columns),  # repeat the filename for all columns
-        'signal_name': new_df.columns,  # the column names as signal names
-        'plot1': True,
-        'plot2': True,
-        'plot3': True,
-        'plot4': True, # die linie macht de plot 4 uf true, wenn de csv file hochglade wird
-    })
+# function to add a parsed file to the shared signal store
+# returns True if the file was already loaded and its data was replaced
+def add_block(block):
+    csv_filename = block.csv_filename
+    replaced = csv_filename in processed_filenames
 
-    # Remove rows where 'signal_name' contains 'Time' or 'Unnamed'
-    new_signals_df = new_signals_df[~new_signals_df['signal_name'].str.contains('Time|Unnamed', case=False, na=False)]
-
-    # Update the df_signals dataframe
-    df_signals = pd.concat([df_signals, new_signals_df], ignore_index=True)
+    # store the file as its own block, already loaded files are not copied (the 'Time' and 'Unnamed' columns are no signals)
+    # the derived signals of a re-uploaded file are evaluated again with the new data
+    # the signals are added to the signals table of every client by show_loaded_files
+    signal_store.add(derived_signals.apply(block))
 
     # add filename to the processed set
     processed_filenames.add(csv_filename)
+    return replaced
 
-    # update the aggrid columnDefs with the new total count
-    column_defs = [
+# function to get the aggrid structure with the current file count
+def get_column_defs():
+    return [
         {"headerName": f"CSV File name | Total files: {len(processed_filenames)}", "field": "csv_filename"},
         {"headerName": "Signal Name", "field": "signal_name"},
         {"headerName": "Plot 1", "field": "plot1", "cellEditor": "agCheckboxCellEditor", "editable": True},
@@ -53,16 +67,245 @@ def handle_upload(event):
         {"headerName": "Plot 3", "field": "plot3", "cellEditor": "agCheckboxCellEditor", "editable": True},
         {"headerName": "Plot 4", "field": "plot4", "cellEditor": "agCheckboxCellEditor", "editable": True},
     ]
-    # try updating the grid's columnDefs and rowData with the new data
-    try:
-        grid.options['columnDefs'] = column_defs
-        grid.options['rowData'] = df_signals.to_dict(orient='records')
-        grid.update()  # asynchronously update the grid to reflect the changes
-    except:
-        pass
 
-    # redirect to results page
-    ui.run_javascript('window.location.href = "/";')
+# function to add the rows and traces of newly loaded files to the open pages of all clients, without reloading them
+def show_loaded_files(replaced_filenames=()):
+    for view in list(client_views.values()):
+        show_view_files(view, replaced_filenames)
+
+# function to add the rows and traces of newly loaded files to the page of one client
+# zoom, layout, sync and the selected tab are kept, the cost only depends on the new files
+@profiled
+def show_view_files(view, replaced_filenames=()):
+    # add only the new rows to the grid
+    view.sync_signals()
+    row_data = view.grid.options['rowData']
+    new_rows = view.get_grid_rows(np.arange(len(row_data), len(view.df_signals)))
+    if new_rows:
+        row_data.extend(new_rows)
+        view.grid.run_grid_method('applyTransaction', {'add': new_rows})
+
+    # update the file count in the header
+    view.grid.options['columnDefs'] = get_column_defs()
+    view.grid.run_grid_method('setGridOption', 'columnDefs', view.grid.options['columnDefs'])
+
+    # reload the traces of files which were loaded again, add the traces of the new signals to the built plots
+    for plot_view in view.plot_views:
+        for csv_filename in replaced_filenames:
+            plot_view.refresh_file(csv_filename)
+    update_visibility(view)
+
+    # show the plots if these are the first files
+    view.update_layout()
+
+# function to load csv files from the filesystem, the files are parsed in parallel in the process pool
+# returns the names of the replaced files and the paths which could not be loaded
+@profiled
+async def load_csv_paths(paths, upload_progress):
+    for path in paths:
+        upload_progress[path.name] = 0.0
+
+    # the workers write the parsed files to the log cache, only the cache digest is sent back (the parsed file only if
+    # it could not be cached)
+    results = await asyncio.gather(*[
+        run.cpu_bound(cache_csv_file, str(path), log_cache.cache_dir, log_cache.max_bytes) for path in paths
+    ], return_exceptions=True)
+
+    replaced_filenames = []
+    failed_paths = []
+    for path, result in zip(paths, results):
+        upload_progress.pop(path.name, None)
+        if isinstance(result, Exception):
+            failed_paths.append(path)
+            continue
+
+        digest, hit, block = result
+        log_cache.record(hit)
+        if block is None:
+            block = log_cache.open(digest, path.name)  # memory-mapped
+        if block is None:
+            block = await run.io_bound(read_csv_block, str(path), path.name)  # evicted by a parallel upload in the meantime
+        if add_block(block):
+            replaced_filenames.append(path.name)
+    return replaced_filenames, failed_paths
+
+# function to open all csv files of a directory or glob pattern from the settings drawer
+@profiled
+async def open_csv_paths(view, pattern):
+    paths = resolve_csv_paths(pattern or '')
+    if not paths:
+        ui.notify(f"No CSV files found for '{pattern}'", type='warning')
+        return
+
+    replaced_filenames, failed_paths = await load_csv_paths(paths, view.upload_progress)
+    for path in failed_paths:
+        ui.notify(f"Could not load {path}", type='negative')
+
+    show_loaded_files(replaced_filenames)
+
+# function to load the csv files given on the command line when the app starts
+async def load_startup_paths():
+    paths = [path for pattern in args.paths for path in resolve_csv_paths(pattern)]
+    signal_store.pin([path.name for path in paths])  # stay loaded while no page is open
+    _, failed_paths = await load_csv_paths(paths, {})
+    for path in failed_paths:
+        print(f"Could not load {path}")
+    for path in args.follow:
+        start_following(None, path)
+
+app.on_startup(load_startup_paths)
+
+# function to handle CSV upload
+@profiled
+async def handle_upload(view, event):
+    csv_filename, stream = await open_upload(event)  # the filename and the content of the uploaded CSV
+    if not view.upload_progress:
+        view.upload_cancel_event.clear()  # a new upload round starts
+    view.upload_progress[csv_filename] = 0.0
+
+    # parse the uploaded stream chunk by chunk in a worker thread (or load it from the cache), so the UI stays responsive
+    def set_progress(fraction):
+        view.upload_progress[csv_filename] = fraction
+
+    try:
+        block = await run.io_bound(load_csv_block, stream, csv_filename, set_progress, view.upload_cancel_event, log_cache)
+    except IngestCancelled:
+        ui.notify(f"Upload of {csv_filename} cancelled", type='warning')
+        return
+    finally:
+        view.upload_progress.pop(csv_filename, None)
+        stream.close()
+
+    replaced = add_block(block)
+
+    # add the new file to the open pages
+    show_loaded_files([csv_filename] if replaced else [])
+
+# function to cancel the running uploads of a client
+def cancel_uploads(view):
+    if view.upload_progress:
+        view.upload_cancel_event.set()
+
+# function to show the parse progress of the running uploads and the cache hit rate in the upload dialog
+def update_upload_progress(view):
+    if view.upload_progress:
+        view.upload_progress_bar.set_value(min(view.upload_progress.values()))
+        view.upload_progress_label.set_text(', '.join(f'{name}: {fraction:.0%}' for name, fraction in view.upload_progress.items()))
+        view.upload_progress_bar.set_visibility(True)
+    else:
+        view.upload_progress_bar.set_visibility(False)
+        view.upload_progress_label.set_text('')
+    view.cache_label.set_text(f'Cache: {log_cache.hits} hits, {log_cache.misses} misses ({log_cache.hit_rate:.0%} hit rate)')
+
+# function to add (or change) a derived signal of a file, it is added as ordinary signal to the signals table of every client
+@profiled
+async def add_derived_signal(csv_filename, signal_name, expression):
+    if not csv_filename or not signal_name or not expression:
+        ui.notify("Select a file and enter a name and an expression", type='warning')
+        return
+
+    # a changed expression changes the values of an existing signal, its traces are reloaded
+    changed = (csv_filename, signal_name) in derived_signals
+    try:
+        block = await run.io_bound(derived_signals.define, signal_store.block(csv_filename), signal_name, expression)
+    except (ValueError, SyntaxError, TypeError, ArithmeticError) as error:
+        ui.notify(f"Invalid expression: {error}", type='negative')
+        return
+
+    signal_store.add(block)
+    show_loaded_files([csv_filename] if changed else [])
+
+# function to put the signals of the selected files on a common time base, they are added as the file 'Aligned: <files>'
+# offsets are added to the time of every file, resolution None uses the finest sample step of the files
+@profiled
+async def align_files(csv_filenames, offsets, resolution, method):
+    if not csv_filenames:
+        ui.notify("Select the files to align", type='warning')
+        return
+
+    blocks = [signal_store.block(csv_filename) for csv_filename in csv_filenames]
+    try:
+        block = await run.io_bound(time_aligner.align, blocks, offsets, resolution, method)
+    except ValueError as error:
+        ui.notify(f"Could not align the files: {error}", type='negative')
+        return
+
+    replaced = add_block(block)
+    show_loaded_files([block.csv_filename] if replaced else [])
+
+# function to show a message on the page of a view, or print it if there is no page (e.g. at startup)
+def report(view, message, type='info'):
+    if view is None:
+        print(message)
+        return
+    with view.client:
+        ui.notify(message, type=type)
+
+# function to follow a csv file which is still being written (e.g. by a running simulation)
+# every poll parses only the appended bytes, the new samples are sent as one batch per poll
+async def follow_file(path, window_rows=TAIL_WINDOW_ROWS):
+    tail = CsvTail(path, window_rows=window_rows)
+    shown = False
+    last_error = None
+    while True:
+        try:
+            n_new, restarted = await run.io_bound(tail.poll)
+            last_error = None
+        except (OSError, ValueError) as error:  # no read permission (the next poll tries again) or lines which can not be parsed (skipped)
+            n_new, restarted = 0, False
+            if str(error) != last_error:  # report an error once, not on every poll
+                last_error = str(error)
+                for view in [None, *client_views.values()]:
+                    report(view, f"Could not read {path}: {error}", type='negative')
+        if n_new or restarted:
+            show_tail_samples(tail, n_new, restarted or not shown)
+            shown = True
+        await asyncio.sleep(TAIL_REFRESH_SECONDS)
+
+# function to add the new samples of a followed file to the store and append them to the plots of all clients
+# the plots are not built again, the traces of the file are extended with the new samples only
+# with replace (first samples or the file was rewritten) the traces of the file are built from the store instead
+@profiled
+def show_tail_samples(tail, n_new, replace):
+    csv_filename = tail.csv_filename
+    replaced = add_block(tail.block())  # the rolling window of the file, the arrays are shared with the tail buffers
+    if replace:
+        show_loaded_files([csv_filename] if replaced else [])
+        return
+    for view in list(client_views.values()):
+        for plot_view in view.plot_views:
+            plot_view.extend_file(csv_filename, n_new)
+
+# function to start following a csv file, the file does not have to exist yet
+# view is the page which started it (messages are shown there), None for the command line
+def start_following(view, path, window_rows=TAIL_WINDOW_ROWS):
+    path = Path(path or '').expanduser()
+    if not path.name:
+        report(view, "Enter the path of the csv file to follow", type='warning')
+        return
+    if path.name in tail_tasks:
+        report(view, f"{path.name} is already followed", type='info')
+        return
+    signal_store.pin([path.name])
+    tail_tasks[path.name] = asyncio.create_task(follow_file(path, int(window_rows or TAIL_WINDOW_ROWS)))
+
+# function to stop following all files, their samples stay loaded
+def stop_following():
+    for task in tail_tasks.values():
+        task.cancel()
+    forget_files(signal_store.unpin(list(tail_tasks)))
+    tail_tasks.clear()
+
+# function to release the view state of a client when its page is closed
+# files which no client shows anymore are dropped, files of the command line and followed files stay loaded
+def close_view(view):
+    client_views.pop(view.client_id, None)
+    forget_files(view.close())
+
+# function to forget the files which were dropped from the signal store
+def forget_files(csv_filenames):
+    processed_filenames.difference_update(csv_filenames)
+    derived_signals.remove(csv_filenames)
 
 # function to customize the plot
 def customize_plot(fig=None, line_width=1):
@@ -84,110 +327,64 @@ def customize_plot(fig=None, line_width=1):
     
     return fig
 
-# function to update trace visibility per plot based on the data from df_signals
-def update_visibility():
-    global df_signals
-
-    # dictionary to map plot ids to plots
-    plots = {'plot1': plot1, 'plot2': plot2, 'plot3': plot3, 'plot4': plot4}
-
-    for _, row in df_signals.iterrows():  # unpack the tuple into index and row
-        signal_name = row['signal_name']
-        visible_plots = {
-            'plot1': row['plot1'],
-            'plot2': row['plot2'],
-            'plot3': row['plot3'],
-            'plot4': row['plot4']
-        }
-
-        for plot_id, is_visible in visible_plots.items():
-            if plot_id in plots:
-                # Update the visibility of traces in the plot
-                fig = plots[plot_id].figure
-                if is_visible:
-                    fig.update_traces(selector=dict(name=signal_name), visible=True)
-                else:
-                    fig.update_traces(selector=dict(name=signal_name), visible=False)
-
-                plots[plot_id].update()
-
-# function to handle zoom events and synchronize x-axis
-def on_zoom(plot_index, event):
+# function to update trace visibility per plot based on the data from df_signals of a client
+# only the rows which changed since the last call are sent, plots which were never shown are only updated when they are built
+@profiled
+def update_visibility(view):
+    for plot_view in view.plot_views:
+        plot_view.sync_selection(view.df_signals)
+
+# function to handle zoom events and reload the downsampled data for the new x-range
+# the x-axis of the synced plots is set in the browser (see X_SYNC_SCRIPT), each synced plot then sends its own zoom event
+@profiled
+def on_zoom(view, plot_index, event):
     relayout_data = event.args  # axes values
-    triggering_checkbox = sync_checkboxes[plot_index].value  # Check if the triggering plot has sync enabled
-
-    # Only sync if the triggering plot's checkbox is enabled
-    if not triggering_checkbox:
-        return  # Ignore zoom events for plots without sync enabled
-
-    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
-        x_start = relayout_data['xaxis.range[0]']
-        x_end = relayout_data['xaxis.range[1]']
-
-        # Synchronize only those plots where the sync checkbox is checked
-        for i, checkbox in enumerate(sync_checkboxes):
-            if checkbox.value and i != plot_index:  # Sync only the checked plots, excluding the triggering one
-                figs[i].update_xaxes(range=[x_start, x_end])
-                plots[i].update()
-    elif 'xaxis.autorange' in relayout_data:
-        # Reset the x-axis range for synced plots
-        for i, checkbox in enumerate(sync_checkboxes):
-            if checkbox.value and i != plot_index:  # Sync only the checked plots, excluding the triggering one
-                figs[i].update_xaxes(range=None)
-                plots[i].update()
-       
-# function to set all values in a column to true or false
-async def set_entire_plot_column(column_name, value):
-    global df_signals, grid
+    changed, x_range = get_relayout_x_range(relayout_data)
+    if not changed or signal_store.empty:
+        return  # Ignore events which do not change the x-axis (e.g. y-axis zoom, autosize)
 
-    # set all values in the specified column to the given value
-    if column_name == 'all':
-        for plot in ['plot1', 'plot2', 'plot3', 'plot4']:
-            df_signals[plot] = value
-    else:
-        # set all values in the specified column to the given value
-        df_signals[column_name] = value
+    # the zoomed plot gets the full resolution data of the new window
+    view.plot_views[plot_index].set_x_range(x_range)
+
+# function to send the plots with enabled sync checkbox to the browser
+@profiled
+def update_sync_plots(view):
+    synced_plots = [plot_view.plot for plot_view, checkbox in zip(view.plot_views, view.sync_checkboxes) if checkbox.value]
+    set_synced_plots(view.client, synced_plots)
+
+# function to set all values in a column to true or false
+@profiled
+async def set_entire_plot_column(view, column_name, value):
+    # set all values in the specified column (or all plot columns) to the given value
+    columns = PLOT_COLUMNS if column_name == 'all' else [column_name]
+    view.set_rows_value(np.arange(len(view.df_signals)), columns, value)
 
-    # rerender the grid with updated data
-    grid.options['rowData'] = df_signals.to_dict(orient='records')
-    grid.update()  # asynchronously update the grid to reflect the changes
-    update_visibility()  # update plot visibility based on new settings
+    update_visibility(view)  # update plot visibility based on new settings
 
 # function to handle plot checkbox changes
-async def handle_plot_checkbox_change(plot, e):
-    await set_entire_plot_column(plot, e.value)
+async def handle_plot_checkbox_change(view, plot, e):
+    await set_entire_plot_column(view, plot, e.value)
 
 # set select rows to false in a specified plot
-async def set_selected_rows_value(plot, value):
-    global df_signals, grid
+@profiled
+async def set_selected_rows_value(view, plot, value):
     # Get the selected rows from the grid
-    rows = await grid.get_selected_rows()
-    if rows:
-        for row in rows:
-            csv_filename = row['csv_filename']
-            signal_name = row['signal_name']
-            mask = (df_signals['csv_filename'] == csv_filename) & (df_signals['signal_name'] == signal_name)
-
-            if plot in ['plot1', 'plot2', 'plot3', 'plot4']:
-                # update corresponding value in df_signals to provided value (true or false)
-                df_signals.loc[mask, plot] = value
-            elif plot == 'all':
-                # update the corresponding row in df_signals
-                if not df_signals[mask].empty:
-                    df_signals.loc[mask, ['plot1', 'plot2', 'plot3', 'plot4']] = value
-    else:
+    rows = await view.grid.get_selected_rows()
+    if not rows:
         ui.notify("No rows selected", type='warning')
+        return
 
-    # Rerender the grid with the updated data
-    grid.options['rowData'] = df_signals.to_dict(orient='records')
-    grid.update()
+    # find the rows in df_signals with the (csv_filename, signal_name) index
+    positions = [view.signal_rows[(row['csv_filename'], row['signal_name'])] for row in rows]
+    columns = PLOT_COLUMNS if plot == 'all' else [plot]
+    view.set_rows_value(positions, columns, value)
 
     # Update plot visibility based on new settings
-    update_visibility()
+    update_visibility(view)
 
 # get selected rows from aggrid
-async def get_selected_rows():
-    rows = await grid.get_selected_rows()
+async def get_selected_rows(view):
+    rows = await view.grid.get_selected_rows()
     print(rows)
 
 # create main page
@@ -195,15 +392,77 @@ async def get_selected_rows():
 def application_page():
     # load the main content
 
-    global df_global, plot1, plot2, plot3, plot4, sync_checkboxes, figs, plots, grid, upload_message
+    # every client (browser tab or window) has its own view state, the signal data is shared
+    view = ClientView(context.client.id, signal_store, customize_plot)
+    view.client = context.client
+    view.left_drawer_state = left_drawer_state
+    view.sync_signals()  # list the files which are already loaded
+    plot_views = view.plot_views
 
-    y_columns = [col for col in df_global.columns if 'Unnamed' not in col and col != 'Time']
+    # script for the x-axis sync in the browser
+    ui.add_head_html(X_SYNC_SCRIPT)
+    ui.add_head_html(EXTEND_TRACES_SCRIPT)
 
     # dialog to upload new csv
     with ui.dialog() as upload_dialog, ui.card():
         with ui.card().classes("mx-auto").style('background: transparent; border: none; box-shadow: none;'):
-            ui.upload(on_upload=handle_upload).props('accept=".csv"').classes('max-w-full')
-            ui.button('Close', on_click=upload_dialog.close)
+            ui.upload(on_upload=lambda event: handle_upload(view, event)).props('accept=".csv"').classes('max-w-full')
+            # parse progress of the uploaded files
+            view.upload_progress_bar = ui.linear_progress(value=0, show_value=False).classes('max-w-full')
+            view.upload_progress_label = ui.label('').style('font-size: 12px;')
+            view.cache_label = ui.label('').style('font-size: 12px; color: gray;')
+            ui.timer(0.2, lambda: update_upload_progress(view))
+            with ui.row():
+                ui.button('Cancel Upload', on_click=lambda: cancel_uploads(view))
+                ui.button('Close', on_click=upload_dialog.close)
+
+    # dialog to define a derived signal over the signals of a file, e.g. `I_dc_ref` - `DC link current`
+    with ui.dialog() as derived_dialog, ui.card().style('width: 600px; max-width: 90vw;'):
+        ui.label('Derived Signal').style('font-size: 16px; font-weight: bold;')
+        derived_file_select = ui.select([], label='CSV file').classes('w-full')
+        derived_name_input = ui.input(label='Signal name').classes('w-full')
+        derived_expression_input = ui.input(label='Expression, e.g. rolling_rms(`DC link current`, 100)').classes('w-full')
+        ui.label('Signal names with spaces or operators in backticks. Functions: ' + ', '.join(EXPRESSION_FUNCTIONS) + ', time').style('font-size: 12px; color: gray;')
+        with ui.row():
+            ui.button('Add', on_click=lambda: add_derived_signal(derived_file_select.value, (derived_name_input.value or '').strip(), derived_expression_input.value))
+            ui.button('Close', on_click=derived_dialog.close)
+
+    # function to open the derived signal dialog with the currently loaded files
+    def open_derived_dialog():
+        derived_file_select.set_options(signal_store.filenames, value=derived_file_select.value if derived_file_select.value in signal_store.filenames else None)
+        derived_dialog.open()
+
+    # dialog to put several files on a common time base, e.g. to compare the p0 and p1 runs sample by sample
+    with ui.dialog() as align_dialog, ui.card().style('width: 700px; max-width: 90vw;'):
+        ui.label('Align Files').style('font-size: 16px; font-weight: bold;')
+        align_file_select = ui.select([], multiple=True, label='CSV files', on_change=lambda: update_offset_inputs()).props('use-chips').classes('w-full')
+        offset_column = ui.column().classes('w-full')
+        offset_inputs = {}  # csv_filename -> time offset input
+        with ui.row().classes('items-center'):
+            align_resolution_input = ui.number(label='Resolution [s], empty: finest sample step').style('width: 300px;')
+            align_method_toggle = ui.toggle({'interpolate': 'Interpolate', 'asof': 'As-of'}, value='interpolate')
+        with ui.row():
+            ui.button('Align', on_click=lambda: align_files(
+                list(align_file_select.value or []),
+                [offset_inputs[csv_filename].value for csv_filename in align_file_select.value or []],
+                align_resolution_input.value,
+                align_method_toggle.value,
+            ))
+            ui.button('Close', on_click=align_dialog.close)
+
+    # function to show a time offset input for every selected file, entered offsets are kept
+    def update_offset_inputs():
+        offset_column.clear()
+        with offset_column:
+            for csv_filename in align_file_select.value or []:
+                offset = offset_inputs[csv_filename].value if csv_filename in offset_inputs else 0
+                offset_inputs[csv_filename] = ui.number(label=f'Time offset [s] {csv_filename}', value=offset).classes('w-full')
+
+    # function to open the align dialog with the currently loaded files
+    def open_align_dialog():
+        csv_filenames = [csv_filename for csv_filename in signal_store.filenames if not is_aligned_filename(csv_filename)]
+        align_file_select.set_options(csv_filenames, value=[csv_filename for csv_filename in align_file_select.value or [] if csv_filename in csv_filenames])
+        align_dialog.open()
 
     # navbar
     with ui.header(elevated=True).style('background-color: #3874c8').classes('items-center justify-between'):
@@ -219,6 +478,28 @@ def application_page():
         ui.label('Upload CSV').style('font-size: 16px; font-weight: bold;')
         ui.button('Upload CSV', icon='file_present').on('click', upload_dialog.open).classes('mx-auto')
 
+        # signals computed from the loaded signals
+        ui.label('Derived Signal').style('font-size: 16px; font-weight: bold;')
+        ui.button('Derived Signal', icon='functions', on_click=open_derived_dialog).classes('mx-auto')
+
+        # common time base for the comparison of several files
+        ui.label('Align Files').style('font-size: 16px; font-weight: bold;')
+        ui.button('Align Files', icon='align_horizontal_left', on_click=open_align_dialog).classes('mx-auto')
+
+        # load files straight from the filesystem, without the upload round-trip
+        ui.label('Open Folder / Glob').style('font-size: 16px; font-weight: bold;')
+        with ui.row().classes('items-center'):
+            path_input = ui.input(placeholder='csv_logs or csv_logs/*p0*.csv').style('width: 200px;')
+            ui.button(icon='folder_open', on_click=lambda: open_csv_paths(view, path_input.value))
+
+        # show a csv file live while it is still being written
+        ui.label('Follow File').style('font-size: 16px; font-weight: bold;')
+        follow_input = ui.input(placeholder='path of the growing csv file').style('width: 250px;')
+        follow_window_input = ui.number(label='Samples kept per file', value=TAIL_WINDOW_ROWS, min=1, precision=0).style('width: 250px;')
+        with ui.row():
+            ui.button('Follow', icon='play_arrow', on_click=lambda: start_following(view, follow_input.value, follow_window_input.value))
+            ui.button('Stop', icon='stop', on_click=stop_following)
+
         ui.separator()
 
         # toggle to select layout
@@ -227,11 +508,19 @@ def application_page():
 
         ui.label('Sync Settings').style('font-size: 16px; font-weight: bold;')
         # create checkboxes for sync settings
-        sync_checkboxes = []
         with ui.column():
             for i in range(4):
-                checkbox = ui.checkbox(f'Sync Plot {i+1}', value=False).style('height: 10px;')
-                sync_checkboxes.append(checkbox)
+                checkbox = ui.checkbox(f'Sync Plot {i+1}', value=False, on_change=lambda: update_sync_plots(view)).style('height: 10px;')
+                view.sync_checkboxes.append(checkbox)
+
+        # SVG is sharper and faster for few points, WebGL keeps pan and zoom smooth for many points
+        ui.label('Rendering').style('font-size: 16px; font-weight: bold;')
+        with ui.column():
+            for i in range(4):
+                with ui.row().classes('items-center'):
+                    ui.label(f'Plot {i+1}').style('width: 50px;')
+                    ui.toggle(RENDER_MODES, value='auto',
+                              on_change=lambda event, i=i: view.plot_views[i].set_render_mode(event.value)).props('dense')
 
         ui.separator()
 
@@ -241,47 +530,47 @@ def application_page():
             ui.label('All Plots').style('font-size: 14px; font-weight: bold;')
             with ui.column():
                 with ui.button_group():
-                    ui.button("Select Row", on_click=lambda: set_selected_rows_value('all', True))
-                    ui.button("Deselect Row", on_click=lambda: set_selected_rows_value('all', False))
+                    ui.button("Select Row", on_click=lambda: set_selected_rows_value(view, 'all', True))
+                    ui.button("Deselect Row", on_click=lambda: set_selected_rows_value(view, 'all', False))
                 with ui.button_group():
-                    ui.button("Select All", on_click=lambda: set_entire_plot_column('all', True))
-                    ui.button("Deselect All", on_click=lambda: set_entire_plot_column('all', False))
+                    ui.button("Select All", on_click=lambda: set_entire_plot_column(view, 'all', True))
+                    ui.button("Deselect All", on_click=lambda: set_entire_plot_column(view, 'all', False))
 
             ui.label('Plot 1').style('font-size: 14px; font-weight: bold;')
             with ui.column():
                 with ui.button_group():
-                    ui.button("Select", on_click=lambda: set_selected_rows_value('plot1', True))
-                    ui.button("Deselect", on_click=lambda: set_selected_rows_value('plot1', False))
+                    ui.button("Select", on_click=lambda: set_selected_rows_value(view, 'plot1', True))
+                    ui.button("Deselect", on_click=lambda: set_selected_rows_value(view, 'plot1', False))
                 with ui.button_group():
-                    ui.button("Select All", on_click=lambda: set_entire_plot_column('plot1', True))
-                    ui.button("Deselect All", on_click=lambda: set_entire_plot_column('plot1', False))
+                    ui.button("Select All", on_click=lambda: set_entire_plot_column(view, 'plot1', True))
+                    ui.button("Deselect All", on_click=lambda: set_entire_plot_column(view, 'plot1', False))
             
             ui.label('Plot 2').style('font-size: 14px; font-weight: bold;')
             with ui.column():
                 with ui.button_group():
-                    ui.button("Select", on_click=lambda: set_selected_rows_value('plot2', True))
-                    ui.button("Deselect", on_click=lambda: set_selected_rows_value('plot2', False))
+                    ui.button("Select", on_click=lambda: set_selected_rows_value(view, 'plot2', True))
+                    ui.button("Deselect", on_click=lambda: set_selected_rows_value(view, 'plot2', False))
                 with ui.button_group():
-                    ui.button("Select All", on_click=lambda: set_entire_plot_column('plot2', True))
-                    ui.button("Deselect All", on_click=lambda: set_entire_plot_column('plot2', False))
+                    ui.button("Select All", on_click=lambda: set_entire_plot_column(view, 'plot2', True))
+                    ui.button("Deselect All", on_click=lambda: set_entire_plot_column(view, 'plot2', False))
             
             ui.label('Plot 3').style('font-size: 14px; font-weight: bold;')
             with ui.column():
                 with ui.button_group():
-                    ui.button("Select", on_click=lambda: set_selected_rows_value('plot3', True))
-                    ui.button("Deselect", on_click=lambda: set_selected_rows_value('plot3', False))
+                    ui.button("Select", on_click=lambda: set_selected_rows_value(view, 'plot3', True))
+                    ui.button("Deselect", on_click=lambda: set_selected_rows_value(view, 'plot3', False))
                 with ui.button_group():
-                    ui.button("Select All", on_click=lambda: set_entire_plot_column('plot3', True))
-                    ui.button("Deselect All", on_click=lambda: set_entire_plot_column('plot3', False))
+                    ui.button("Select All", on_click=lambda: set_entire_plot_column(view, 'plot3', True))
+                    ui.button("Deselect All", on_click=lambda: set_entire_plot_column(view, 'plot3', False))
             
             ui.label('Plot 4').style('font-size: 14px; font-weight: bold;')
             with ui.column():
                 with ui.button_group():
-                    ui.button("Select", on_click=lambda: set_selected_rows_value('plot4', True))
-                    ui.button("Deselect", on_click=lambda: set_selected_rows_value('plot4', False))
+                    ui.button("Select", on_click=lambda: set_selected_rows_value(view, 'plot4', True))
+                    ui.button("Deselect", on_click=lambda: set_selected_rows_value(view, 'plot4', False))
                 with ui.button_group():
-                    ui.button("Select All", on_click=lambda: set_entire_plot_column('plot4', True))
-                    ui.button("Deselect All", on_click=lambda: set_entire_plot_column('plot4', False))
+                    ui.button("Select All", on_click=lambda: set_entire_plot_column(view, 'plot4', True))
+                    ui.button("Deselect All", on_click=lambda: set_entire_plot_column(view, 'plot4', False))
             
     # main content
     with ui.row().classes('mx-auto'):
@@ -295,17 +584,16 @@ def application_page():
             with ui.tab_panel(line_chart):
 
                 with ui.row().classes('w-full justify-around'):
+                    @profiled
                     def update_layout():
-                        global df_global, plot1, plot2, plot3, plot4, figs, plots, upload_message
-
                         layout = toggle1.value
-                        drawer_width = 300 if left_drawer_state else 0  # Width of the drawer in pixels, 0 if closed
+                        drawer_width = 300 if view.left_drawer_state else 0  # Width of the drawer in pixels, 0 if closed
                         full_width = f'calc(95vw - {drawer_width}px)'
                         half_width = f'calc(47vw - {drawer_width/2}px)'
                         full_height = f'calc(95vh - 135px)' # approximately height of the navbar + tabsbar
                         half_height = f'calc(45vh - 67px)'
 
-                        if not df_global.empty:
+                        if not signal_store.empty:
                             # Hide the upload message if data is available
                             upload_message.style('display: none;')
 
@@ -331,6 +619,11 @@ def application_page():
                                 plot3.style(f'display: block; width: {half_width}; height: {half_height};').classes('mx-auto')
                                 plot4.style(f'display: block; width: {half_width}; height: {half_height};').classes('mx-auto')
 
+                            # build the figures of the plots which are shown for the first time
+                            shown_plots = {"1x1": 1, "1x2": 2, "2x1": 2, "2x2": 4}[layout]
+                            for plot_view in plot_views[:shown_plots]:
+                                if not plot_view.built:
+                                    plot_view.build(view.df_signals)
                         else:
                             # If no data, show the upload message and hide all plots
                             upload_message.style(f'display: flex; width: {full_width}; height: {full_height}; justify-content: center; align-items: center; font-size: 24px;')
@@ -339,16 +632,18 @@ def application_page():
                             plot3.style('display: none;')
                             plot4.style('display: none;')
 
-                        ui.run_javascript('window.dispatchEvent(new Event("resize"));')
+                        # the client of the view, the layout is also updated when another client loads a file
+                        view.client.run_javascript('window.dispatchEvent(new Event("resize"));')
+
+                    view.update_layout = update_layout
 
                     # Update drawer state and layout when drawer is toggled
                     def on_drawer_toggle(state):
-                        global left_drawer_state
-                        left_drawer_state = state
+                        view.left_drawer_state = state
                         update_layout()
                         
                         # calculate new grid width
-                        grid_width = f'calc(95vw - {300 if left_drawer_state else 0}px)'
+                        grid_width = f'calc(95vw - {300 if view.left_drawer_state else 0}px)'
                         
                         # update new grid width
                         grid.style(f'width: {grid_width}; height: 85vh;')
@@ -366,85 +661,81 @@ def application_page():
                         # Placeholder for "Upload CSV" message
                         upload_message = ui.label('Upload CSV').style('display: none;').classes('text-center text-xl')
 
-                        # create plots with custom settings
-                        if not df_global.empty:
-                            fig1 = customize_plot(px.line(df_global, x='Time', y=y_columns, title='Plot 1', template="plotly_white"))
-                            fig2 = customize_plot(px.line(df_global, x='Time', y=y_columns, title='Plot 2', template="plotly_white"))
-                            fig3 = customize_plot(px.line(df_global, x='Time', y=y_columns, title='Plot 3', template="plotly_white"))
-                            fig4 = customize_plot(px.line(df_global, x='Time', y=y_columns, title='Plot 4', template="plotly_white"))
-                        else:
-                            # No data uploaded, create empty plots
-                            fig1, fig2, fig3, fig4 = customize_plot(), customize_plot(), customize_plot(), customize_plot()
+                        # create plots with empty figures, the data is added by update_layout when a plot is shown
+                        # only a bounded number of points per trace is sent, zooming reloads the visible window
+                        fig1, fig2, fig3, fig4 = customize_plot(), customize_plot(), customize_plot(), customize_plot()
 
-                        plot1 = ui.plotly(fig1).on('plotly_relayout', lambda event: on_zoom(0, event)).classes('mx-auto').style('display: none;')
-                        plot2 = ui.plotly(fig2).on('plotly_relayout', lambda event: on_zoom(1, event)).classes('mx-auto').style('display: none;')
-                        plot3 = ui.plotly(fig3).on('plotly_relayout', lambda event: on_zoom(2, event)).classes('mx-auto').style('display: none;')
-                        plot4 = ui.plotly(fig4).on('plotly_relayout', lambda event: on_zoom(3, event)).classes('mx-auto').style('display: none;')
+                        plot1 = EncodedPlotly(fig1).classes('mx-auto').style('display: none;')
+                        plot2 = EncodedPlotly(fig2).classes('mx-auto').style('display: none;')
+                        plot3 = EncodedPlotly(fig3).classes('mx-auto').style('display: none;')
+                        plot4 = EncodedPlotly(fig4).classes('mx-auto').style('display: none;')
+                        for i, plot in enumerate([plot1, plot2, plot3, plot4]):
+                            # sync the x-axis in the browser right away, reload the data on the server for the latest zoom only
+                            plot.on('plotly_relayout', js_handler=x_sync_handler(plot))
+                            plot.on('plotly_relayout', lambda event, i=i: on_zoom(view, i, event),
+                                    throttle=ZOOM_EVENT_THROTTLE, leading_events=False)
 
-                        figs = [fig1, fig2, fig3, fig4]
-                        plots = [plot1, plot2, plot3, plot4]
-                    # Update plot visibility based on settings 
-                    update_visibility()
+                        for plot_view, plot in zip(plot_views, [plot1, plot2, plot3, plot4]):
+                            plot_view.plot = plot
 
             # signals table with ui.aggrid
             with ui.tab_panel(signals_table):
 
                 # context menu for the grid, to select/deselect signals on plots
                 with ui.context_menu():
-                    ui.menu_item('Select Row', on_click=lambda: set_selected_rows_value('all', True))
-                    ui.menu_item('Deselect Row', on_click=lambda: set_selected_rows_value('all', False))
+                    ui.menu_item('Select Row', on_click=lambda: set_selected_rows_value(view, 'all', True))
+                    ui.menu_item('Deselect Row', on_click=lambda: set_selected_rows_value(view, 'all', False))
                     for plot in range(1, 5):
                         ui.separator()
-                        ui.menu_item(f'Select Plot {plot}', on_click=lambda p=plot: set_selected_rows_value(f'plot{p}', True))
-                        ui.menu_item(f'Deselect Plot {plot}', on_click=lambda p=plot: set_selected_rows_value(f'plot{p}', False))
+                        ui.menu_item(f'Select Plot {plot}', on_click=lambda p=plot: set_selected_rows_value(view, f'plot{p}', True))
+                        ui.menu_item(f'Deselect Plot {plot}', on_click=lambda p=plot: set_selected_rows_value(view, f'plot{p}', False))
                     
                 # data from df_signals
-                data = df_signals.to_dict(orient='records')
+                data = view.get_grid_rows()
 
                 # aggrid structure
-                column_defs = [
-                    {"headerName": f"CSV File name | Total files: {len(processed_filenames)}", "field": "csv_filename"},
-                    {"headerName": "Signal Name", "field": "signal_name"}, 
-                    {"headerName": "Plot 1", "field": "plot1", "cellEditor": "agCheckboxCellEditor", "editable": True},
-                    {"headerName": "Plot 2", "field": "plot2", "cellEditor": "agCheckboxCellEditor", "editable": True},
-                    {"headerName": "Plot 3", "field": "plot3", "cellEditor": "agCheckboxCellEditor", "editable": True},
-                    {"headerName": "Plot 4", "field": "plot4", "cellEditor": "agCheckboxCellEditor", "editable": True},
-                ]
+                column_defs = get_column_defs()
                 
-                grid_width = f'calc(95vw - {300 if left_drawer_state else 0}px)'
+                grid_width = f'calc(95vw - {300 if view.left_drawer_state else 0}px)'
                 # create aggrid grid
                 grid = ui.aggrid({
                     'defaultColDef': {'flex': 1},
                     'columnDefs': column_defs,
                     'rowData': data,
                     'rowSelection': 'multiple',
+                    ':getRowId': '(params) => params.data.row_id',
                 }).style(f'width: {grid_width}; height: 85vh;').classes('mx-auto')
+                view.grid = grid
 
                 # event handler for grid value change
+                @profiled
                 def on_grid_value_change(event):
-                    global df_signals
-
                     # extract data from the event
                     data = event.args['data']
-                    
+
                     # Find the row in df_signals to update
-                    csv_filename = data['csv_filename']
-                    signal_name = data['signal_name']
-                    
-                    # Update the relevant row in df_signals
-                    mask = (df_signals['csv_filename'] == csv_filename) & (df_signals['signal_name'] == signal_name)
-                    if not df_signals[mask].empty:
-                        df_signals.loc[mask, 'plot1'] = data['plot1']
-                        df_signals.loc[mask, 'plot2'] = data['plot2']
-                        df_signals.loc[mask, 'plot3'] = data['plot3']
-                        df_signals.loc[mask, 'plot4'] = data['plot4']
+                    position = view.signal_rows.get((data['csv_filename'], data['signal_name']))
+
+                    # Update the relevant row in df_signals (the grid already shows the new value)
+                    if position is not None:
+                        df_signals = view.df_signals
+                        df_signals.iloc[position, [df_signals.columns.get_loc(column) for column in PLOT_COLUMNS]] = [data[column] for column in PLOT_COLUMNS]
+                        grid.options['rowData'][position].update({column: data[column] for column in PLOT_COLUMNS})
 
-                    update_visibility() # update plot visibility based on new settings
+                    update_visibility(view) # update plot visibility based on new settings
 
                 # event listener for ui.aggrid (checkboxes) value changes
                 grid.on('cellValueChanged', on_grid_value_change)
 
     update_layout()
 
+    # the page is complete, loaded files are added to it from now on
+    client_views[view.client_id] = view
+    # newer nicegui versions call on_disconnect also for a short connection loss, on_delete only when the page is gone
+    if hasattr(context.client, 'on_delete'):
+        context.client.on_delete(lambda: close_view(view))
+    else:
+        context.client.on_disconnect(lambda: close_view(view))  # nicegui 2.x: after the reconnect timeout
+
 # run in native mode
 ui.run(title="PlottingApplication", native=True, fullscreen=False, window_size=(2500, 1300))
\ No newline at end of file
@@ -0,0 +1,168 @@
+import base64
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+from nicegui import ui
+
+BINARY_TRANSPORT = True  # send numeric arrays as base64 typed arrays (plotly.js >= 2.28), False sends plain JSON lists
+
+# numpy dtype -> plotly.js typed array dtype (little-endian)
+TYPED_ARRAY_DTYPES = {
+    np.dtype('float64'): 'f8',
+    np.dtype('float32'): 'f4',
+    np.dtype('int32'): 'i4',
+    np.dtype('uint32'): 'u4',
+    np.dtype('int16'): 'i2',
+    np.dtype('uint16'): 'u2',
+    np.dtype('int8'): 'i1',
+    np.dtype('uint8'): 'u1',
+}
+
+
+# function to convert numpy values in plotly.js arguments to JSON compatible python values
+def to_json_value(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+# function to encode a numpy array as plotly.js typed array spec {'dtype': ..., 'bdata': <base64>}
+def encode_array(values):
+    if values.dtype == np.int64 or values.dtype == np.uint64 or values.dtype == np.bool_:
+        values = values.astype(np.float64)  # plotly.js has no 64 bit integer typed arrays
+    dtype = TYPED_ARRAY_DTYPES.get(values.dtype.newbyteorder('='))
+    if dtype is None or values.ndim != 1:
+        return values.tolist()  # e.g. strings and objects stay plain JSON
+    values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+    return {'dtype': dtype, 'bdata': base64.b64encode(values.data).decode('ascii')}
+
+
+# function to decode a plotly.js typed array spec back to a list
+def decode_array(spec):
+    dtype = np.dtype('<' + spec['dtype'].rstrip('c'))
+    return np.frombuffer(base64.b64decode(spec['bdata']), dtype=dtype).tolist()
+
+
+# function to prepare figure or trace JSON for the browser, numeric arrays are sent as typed arrays or as plain lists
+def encode_arrays(value, binary=None):
+    binary = BINARY_TRANSPORT if binary is None else binary
+    if isinstance(value, np.ndarray):
+        return encode_array(value) if binary else value.tolist()
+    if isinstance(value, dict):
+        if not binary and 'bdata' in value and 'dtype' in value:
+            return decode_array(value)  # newer plotly versions encode arrays by themselves
+        return {key: encode_arrays(item, binary) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_arrays(item, binary) for item in value]
+    return value
+
+
+# function to get the JSON of a go.Figure for ui.plotly with the trace data encoded for transport
+def encode_figure(fig, binary=None):
+    figure_json = fig.to_plotly_json()
+    figure_json['data'] = encode_arrays(figure_json['data'], binary)
+    return figure_json
+
+
+# ui.plotly which sends a go.Figure with the trace data encoded for transport (see encode_figure)
+# the PlotView keeps its live figure as the figure of the element, so a figure which is sent again (e.g. after a style
+# change of the element) has all changes which were applied in the browser with restyle, addTraces or extendTraces
+class EncodedPlotly(ui.plotly):
+    def _get_figure_json(self):
+        if isinstance(self.figure, go.Figure):
+            return encode_figure(self.figure)
+        return super()._get_figure_json()
+
+
+# function to run a plotly.js function (e.g. 'restyle', 'relayout') on the chart of a ui.plotly element
+# only the arguments are sent to the browser, the figure itself is not re-serialized
+def run_plot_method(plot, name, *args):
+    args = encode_arrays(args)
+    if hasattr(plot, 'run_plot_method'):  # available since nicegui 3.13
+        plot.run_plot_method(name, *args)
+        return
+
+    arguments = ''.join(f', {json.dumps(arg, default=to_json_value)}' for arg in args)
+    plot.client.run_javascript(
+        f'{{ const el = document.getElementById("c{plot.id}");'
+        f'if (el && el.data) Plotly.{name}(el{arguments}); }}'  # skip charts which are not rendered yet
+    )
+
+
+# client side x-axis sync: a relayout of a synced plot is applied to the other synced plots right away in the browser,
+# without a round trip to the server. window.plotXSync.ids holds the element ids of the synced plots.
+X_SYNC_SCRIPT = """
+<script>
+window.plotXSync = { ids: [] };
+function syncXRange(sourceId, event) {
+  const source = document.getElementById(sourceId);
+  if (source && source.xSyncEcho) {
+    source.xSyncEcho = false;  // event of a relayout done by this function
+    return;
+  }
+  if (!window.plotXSync.ids.includes(sourceId)) return;
+
+  let update = null;
+  if ("xaxis.range[0]" in event && "xaxis.range[1]" in event) update = { "xaxis.range": [event["xaxis.range[0]"], event["xaxis.range[1]"]] };
+  else if ("xaxis.range" in event) update = { "xaxis.range": event["xaxis.range"] };
+  else if (event["xaxis.autorange"]) update = { "xaxis.autorange": true };
+  if (!update) return;
+
+  for (const id of window.plotXSync.ids) {
+    const el = document.getElementById(id);
+    if (id === sourceId || !el || !el.data) continue;
+    el.xSyncEcho = true;
+    Plotly.relayout(el, update);
+  }
+}
+</script>
+"""
+
+
+# client side extendTraces for the live tail: Plotly.extendTraces can only extend plain or typed arrays of the same
+# type, so the typed array specs (bdata) of the trace data and of the new samples are decoded first
+EXTEND_TRACES_SCRIPT = """
+<script>
+const plotArrayTypes = { f8: Float64Array, f4: Float32Array, i4: Int32Array, u4: Uint32Array, i2: Int16Array, u2: Uint16Array, i1: Int8Array, u1: Uint8Array };
+function decodePlotArray(value) {
+  if (!value || typeof value.bdata !== "string") return value;
+  const bytes = Uint8Array.from(atob(value.bdata), (c) => c.charCodeAt(0));
+  return new plotArrayTypes[value.dtype](bytes.buffer);
+}
+function extendPlotTraces(id, update, indices, maxPoints) {
+  const el = document.getElementById(id);
+  if (!el || !el.data) return;  // chart not rendered yet, it gets the samples with the next full update
+  for (const key in update) {
+    update[key] = update[key].map((insert, j) => {
+      const trace = el.data[indices[j]];
+      const target = trace[key] = decodePlotArray(trace[key]) || [];
+      insert = decodePlotArray(insert);
+      if (target.constructor === insert.constructor) return insert;
+      return Array.isArray(target) ? Array.from(insert) : new target.constructor(insert);
+    });
+  }
+  Plotly.extendTraces(el, update, indices, maxPoints);
+}
+</script>
+"""
+
+
+# function to append data to traces of a ui.plotly element (see EXTEND_TRACES_SCRIPT), e.g. {'x': [...], 'y': [...]}
+# max_points (one length per trace) keeps only the newest points of every trace, like Plotly.extendTraces
+def extend_traces(plot, update, indices, max_points=None):
+    update = json.dumps(encode_arrays(update), default=to_json_value)
+    max_points = json.dumps({key: [int(n) for n in max_points] for key in ('x', 'y')} if max_points is not None else None)
+    plot.client.run_javascript(f'extendPlotTraces("c{plot.id}", {update}, {json.dumps(list(indices))}, {max_points});')
+
+
+# function to set which plots are synced on the client
+def set_synced_plots(client, plots):
+    client.run_javascript(f'window.plotXSync.ids = {json.dumps([f"c{plot.id}" for plot in plots])};')
+
+
+# function to get the js_handler of a ui.plotly element which syncs its x-axis to the other synced plots
+def x_sync_handler(plot):
+    return f'(event) => syncXRange("c{plot.id}", event)'
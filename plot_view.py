@@ -0,0 +1,177 @@
+import numpy as np
+
+from downsampling import DEFAULT_MAX_POINTS, downsample, minmax_downsample
+from figure_builder import (RENDER_MODES, build_figure, convert_traces, count_points, get_trace_sources, make_trace,
+                            refresh_figure_data, use_webgl)
+from plot_client import extend_traces, run_plot_method
+
+
+# one of the four plots, the figure is built when the plot is shown the first time and a trace
+# is only created when its signal is selected for this plot. The full resolution data stays in the
+# signal store (shared by all plots), the figure only holds the downsampled data of its traces.
+class PlotView:
+    def __init__(self, plot_id, title, signal_store, customize, max_points=DEFAULT_MAX_POINTS):
+        self.plot_id = plot_id  # column of the signals table with the selection of this plot
+        self.title = title
+        self.signal_store = signal_store
+        self.customize = customize  # function to apply the plot appearance to a figure
+        self.max_points = max_points
+
+        self.plot = None  # ui.plotly element, created by the page
+        self.fig = None  # None until the plot is built
+        self.x_range = None  # visible x-range, None for autorange
+        self.trace_keys = []  # (csv_filename, signal_name) of every trace
+        self.row_selected = np.zeros(0, dtype=bool)  # plotN flag of every row of the signals table
+        self.row_trace = np.zeros(0, dtype=np.int64)  # trace index of every row, -1 while its trace is not created
+        self.render_mode = 'auto'  # 'auto', 'svg' or 'webgl', see figure_builder.RENDER_MODES
+        self.webgl = False  # the traces are drawn with WebGL (scattergl)
+
+    @property
+    def built(self):
+        return self.fig is not None
+
+    # function to grow the row arrays for rows appended to the signals table
+    def _resize(self, n_rows):
+        n_new = n_rows - len(self.row_selected)
+        if n_new > 0:
+            self.row_selected = np.concatenate((self.row_selected, np.zeros(n_new, dtype=bool)))
+            self.row_trace = np.concatenate((self.row_trace, np.full(n_new, -1, dtype=np.int64)))
+
+    # function to get the keys of the given rows of the signals table
+    @staticmethod
+    def _row_keys(df_signals, rows):
+        csv_filenames = df_signals['csv_filename'].to_numpy()[rows]
+        signal_names = df_signals['signal_name'].to_numpy()[rows]
+        return list(zip(csv_filenames, signal_names))
+
+    # function to build the figure with the traces of all selected rows
+    def build(self, df_signals):
+        self._resize(len(df_signals))
+        self.row_selected[:] = df_signals[self.plot_id].to_numpy(dtype=bool)
+        rows = np.flatnonzero(self.row_selected)
+
+        self.trace_keys = self._row_keys(df_signals, rows)
+        self.row_trace[:] = -1
+        self.row_trace[rows] = np.arange(len(rows))
+
+        trace_sources = get_trace_sources(self.signal_store, self.trace_keys)
+        self.webgl = use_webgl(count_points(trace_sources, self.x_range, self.max_points), self.render_mode)
+        self.fig = self.customize(build_figure(trace_sources, self.title, self.x_range, self.max_points, webgl=self.webgl))
+        # the element keeps the live figure, the changes below are applied to it in place (see EncodedPlotly)
+        self.plot.update_figure(self.fig)
+
+    # function to apply the selection of the signals table, only changed rows are sent to the browser
+    def sync_selection(self, df_signals):
+        selected = df_signals[self.plot_id].to_numpy(dtype=bool)
+        self._resize(len(selected))
+        changed = np.flatnonzero(selected != self.row_selected)
+        if not len(changed):
+            return
+        self.row_selected[changed] = selected[changed]
+        if not self.built:
+            return  # the selection is applied when the plot is built
+
+        # rows with an existing trace are shown/hidden, newly selected rows get a new trace
+        restyle_rows = changed[self.row_trace[changed] >= 0]
+        new_rows = changed[(self.row_trace[changed] < 0) & selected[changed]]
+
+        if len(restyle_rows):
+            indices = self.row_trace[restyle_rows].tolist()
+            values = selected[restyle_rows].tolist()
+            # keep the server side figure in sync, without sending it again
+            for index, value in zip(indices, values):
+                self.fig.data[index].visible = value
+            run_plot_method(self.plot, 'restyle', {'visible': values}, indices)
+
+        if len(new_rows):
+            self._add_traces(self._row_keys(df_signals, new_rows), new_rows)
+        self._update_render_mode()
+
+    # function to create the traces of newly selected rows and send only these traces
+    def _add_traces(self, keys, rows):
+        start = len(self.fig.data)
+        trace_sources = get_trace_sources(self.signal_store, keys)
+        self.fig.add_traces([make_trace(key, x, y, self.x_range, self.max_points, webgl=self.webgl) for key, x, y in trace_sources])
+        self.customize(self.fig)
+
+        self.trace_keys.extend(keys)
+        self.row_trace[rows] = np.arange(start, start + len(keys))
+        run_plot_method(self.plot, 'addTraces', [trace.to_plotly_json() for trace in self.fig.data[start:]])
+
+    # function to reload the traces of a file after its data was replaced (e.g. uploaded again)
+    def refresh_file(self, csv_filename):
+        if not self.built:
+            return
+        indices = [i for i, key in enumerate(self.trace_keys) if key[0] == csv_filename]
+        if not indices:
+            return
+
+        trace_sources = get_trace_sources(self.signal_store, [self.trace_keys[i] for i in indices])
+        for index, (_, x, y) in zip(indices, trace_sources):
+            self.fig.data[index].x, self.fig.data[index].y = downsample(x, y, self.x_range, self.max_points)
+        data = {'x': [self.fig.data[i].x for i in indices], 'y': [self.fig.data[i].y for i in indices]}
+        run_plot_method(self.plot, 'restyle', data, indices)
+        self._update_render_mode()
+
+    # function to append the newest n_new samples of a file to its traces (live tail), with one extendTraces call
+    # the new samples are downsampled to the density of the trace and points older than the window of the file are
+    # dropped, a trace which got twice as long as max_points is downsampled again from the store.
+    # A zoomed plot keeps its window, the new samples are loaded with the next zoom.
+    def extend_file(self, csv_filename, n_new):
+        if not self.built or self.x_range is not None or n_new <= 0:
+            return
+        indices = [i for i, key in enumerate(self.trace_keys) if key[0] == csv_filename]
+        if not indices:
+            return
+
+        trace_sources = get_trace_sources(self.signal_store, [self.trace_keys[i] for i in indices])
+        xs, ys, lengths = [], [], []
+        for index, (_, x, y) in zip(indices, trace_sources):
+            n_batch = min(n_new, len(x))
+            x_new, y_new = minmax_downsample(x[-n_batch:], y[-n_batch:], max(2, -(-self.max_points * n_batch // max(len(x), 1))))
+            # the points of samples which left the window of the file are dropped (here and in the browser)
+            trace = self.fig.data[index]
+            trace_x, trace_y = np.concatenate((trace.x, x_new)), np.concatenate((trace.y, y_new))
+            keep = np.searchsorted(trace_x, x[0]) if len(x) else 0
+            trace.x, trace.y = trace_x[keep:], trace_y[keep:]
+            xs.append(x_new)
+            ys.append(y_new)
+            lengths.append(len(trace_x) - keep)
+        extend_traces(self.plot, {'x': xs, 'y': ys}, indices, lengths)
+
+        if any(len(self.fig.data[index].x) > 2 * self.max_points for index in indices):
+            self.refresh_file(csv_filename)
+        else:
+            self._update_render_mode()
+
+    # function to load the full resolution data of the visible window after the x-range was changed in the browser
+    # only the trace data is sent (one restyle), the range itself is already set on the client
+    def set_x_range(self, x_range):
+        self.x_range = x_range
+        if not self.built:
+            return  # the range is used when the plot is built
+        refresh_figure_data(self.fig, get_trace_sources(self.signal_store, self.trace_keys), x_range, self.max_points)
+        if self.fig.data:
+            data = {'x': [trace.x for trace in self.fig.data], 'y': [trace.y for trace in self.fig.data]}
+            run_plot_method(self.plot, 'restyle', data, list(range(len(self.fig.data))))
+        self._update_render_mode()
+
+    # function to set the render mode of the plot ('auto', 'svg' or 'webgl'), e.g. from the settings drawer
+    def set_render_mode(self, render_mode):
+        if render_mode not in RENDER_MODES:
+            raise ValueError(f"unknown render mode {render_mode!r}, expected one of {', '.join(RENDER_MODES)}")
+        self.render_mode = render_mode
+        if self.built:
+            self._update_render_mode()
+
+    # function to switch between SVG and WebGL traces if the number of visible points crossed the threshold
+    # the trace type is changed in the browser with one restyle, zoom and selection stay as they are
+    def _update_render_mode(self):
+        n_points = sum(len(trace.x) for trace in self.fig.data if trace.visible is not False)
+        webgl = use_webgl(n_points, self.render_mode)
+        if webgl == self.webgl:
+            return
+        self.webgl = webgl
+        self.fig = self.plot.figure = convert_traces(self.fig, webgl)
+        if self.fig.data:
+            run_plot_method(self.plot, 'restyle', {'type': 'scattergl' if webgl else 'scatter'})
@@ -0,0 +1,173 @@
+import itertools
+import re
+
+import numpy as np
+import pandas as pd
+
+TIME_COLUMN = 'Time'
+IGNORED_COLUMNS = re.compile('Time|Unnamed', re.IGNORECASE)  # time axis and the empty column of the trailing ';'
+BLOCK_VERSIONS = itertools.count(1)
+
+
+# function to check if a csv column is a signal (and not the time axis or an empty column)
+def is_signal_column(column_name):
+    return not IGNORED_COLUMNS.search(str(column_name))
+
+
+# function to convert a column to float32 if that is lossless, else float64
+def to_signal_array(values):
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(over='ignore', invalid='ignore'):  # values beyond the float32 range become inf and fail the check
+        narrow = values.astype(np.float32)
+    if np.array_equal(narrow, values, equal_nan=True):
+        return narrow
+    return values
+
+
+# time-indexed signal arrays of one csv file
+class FileBlock:
+    def __init__(self, csv_filename, time, signals, version=None):
+        self.csv_filename = csv_filename
+        self.time = time  # float64, sorted ascending
+        self.signals = signals  # dict signal_name -> float32/float64 array with the same length as time
+        self.version = next(BLOCK_VERSIONS) if version is None else version  # new for every parsed (or re-uploaded) file
+
+        # arrays are shared with the plots, protect them against accidental modification
+        self.time.flags.writeable = False
+        for values in self.signals.values():
+            values.flags.writeable = False
+
+    # function to create a block from float64 column arrays (drops samples without time, sorts by time, narrows to float32)
+    @classmethod
+    def from_arrays(cls, csv_filename, time, signals):
+        if time is None:
+            # use the sample index if the log has no time axis
+            time = np.arange(len(next(iter(signals.values()), [])), dtype=np.float64)
+
+        # drop samples without time and sort by time, so time windows can be found by binary search
+        order = None
+        valid = ~np.isnan(time)
+        if not valid.all():
+            order = np.flatnonzero(valid)
+        if len(time) > 1 and np.any(np.diff(time[valid]) < 0):
+            order = np.flatnonzero(valid)[np.argsort(time[valid], kind='stable')]
+        if order is not None:
+            time = time[order]
+
+        # convert one signal at a time, so only one extra copy exists at any point
+        for signal_name in list(signals):
+            values = signals[signal_name]
+            signals[signal_name] = to_signal_array(values if order is None else values[order])
+
+        return cls(csv_filename, time, signals)
+
+    # function to create a block from a parsed csv dataframe
+    @classmethod
+    def from_dataframe(cls, csv_filename, df):
+        time = None
+        if TIME_COLUMN in df.columns:
+            time = pd.to_numeric(df[TIME_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+
+        signals = {
+            str(column): pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+            for column in df.columns if is_signal_column(column)
+        }
+        return cls.from_arrays(csv_filename, time, signals)
+
+    # function to get a block of the same file with other signals (e.g. with derived signals), the arrays are shared
+    def with_signals(self, signals):
+        return FileBlock(self.csv_filename, self.time, signals, self.version)
+
+    @property
+    def signal_names(self):
+        return list(self.signals)
+
+    @property
+    def nbytes(self):
+        return self.time.nbytes + sum(values.nbytes for values in self.signals.values())
+
+    def __len__(self):
+        return len(self.time)
+
+
+# store of all uploaded files, every file keeps its own time axis and signals are looked up by (csv_filename, signal_name)
+# the store is shared by all clients: blocks are read-only and replaced as a whole, so every client reads the same arrays
+# and no client can change the data of another one. The clients which show a file are counted per file, a file which
+# is not shown by any client anymore is dropped unless it is pinned (e.g. loaded on the command line).
+class SignalStore:
+    def __init__(self):
+        self._blocks = {}  # csv_filename -> FileBlock
+        self._refs = {}  # csv_filename -> number of clients which show the file
+        self._pinned = set()  # files which stay loaded while no client shows them
+
+    # function to add (or replace) a file, other files are not touched
+    def add(self, block):
+        self._blocks[block.csv_filename] = block
+
+    # function to register a client as user of the given files
+    def acquire(self, csv_filenames):
+        for csv_filename in csv_filenames:
+            self._refs[csv_filename] = self._refs.get(csv_filename, 0) + 1
+
+    # function to unregister a client from the given files (e.g. when its browser tab is closed)
+    # files which are not shown by any client anymore are dropped, returns the names of the dropped files
+    def release(self, csv_filenames):
+        for csv_filename in csv_filenames:
+            count = self._refs.get(csv_filename, 0) - 1
+            if count > 0:
+                self._refs[csv_filename] = count
+            else:
+                self._refs.pop(csv_filename, None)
+        return self._drop_unreferenced(csv_filenames)
+
+    # function to keep files loaded while no client shows them, the files do not have to be loaded yet
+    def pin(self, csv_filenames):
+        self._pinned.update(csv_filenames)
+
+    # function to let files be dropped again when no client shows them, returns the names of the dropped files
+    def unpin(self, csv_filenames):
+        csv_filenames = list(csv_filenames)
+        self._pinned.difference_update(csv_filenames)
+        return self._drop_unreferenced(csv_filenames)
+
+    def _drop_unreferenced(self, csv_filenames):
+        dropped = [csv_filename for csv_filename in csv_filenames
+                   if csv_filename in self._blocks and csv_filename not in self._refs and csv_filename not in self._pinned]
+        for csv_filename in dropped:
+            del self._blocks[csv_filename]
+        return dropped
+
+    # function to get the number of clients which show a file
+    def ref_count(self, csv_filename):
+        return self._refs.get(csv_filename, 0)
+
+    # function to get the (time, values) arrays of a signal
+    def get(self, key):
+        csv_filename, signal_name = key
+        block = self._blocks[csv_filename]
+        return block.time, block.signals[signal_name]
+
+    def block(self, csv_filename):
+        return self._blocks[csv_filename]
+
+    def keys(self):
+        return [(csv_filename, signal_name) for csv_filename, block in self._blocks.items() for signal_name in block.signals]
+
+    @property
+    def filenames(self):
+        return list(self._blocks)
+
+    @property
+    def nbytes(self):
+        return sum(block.nbytes for block in self._blocks.values())
+
+    @property
+    def empty(self):
+        return not self._blocks
+
+    def __contains__(self, key):
+        csv_filename, signal_name = key
+        return csv_filename in self._blocks and signal_name in self._blocks[csv_filename].signals
+
+    def __len__(self):
+        return len(self._blocks)
@@ -0,0 +1,163 @@
+import io
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ingest import CSV_DELIMITER, is_loaded_column
+from signal_store import TIME_COLUMN, FileBlock, to_signal_array
+
+TAIL_WINDOW_ROWS = 1_000_000  # samples kept per followed file, older samples are dropped
+TAIL_INITIAL_ROWS = 65_536  # initial buffer size, the buffers grow up to twice the window
+TAIL_READ_BYTES = 64 * 1024 * 1024  # bytes parsed per poll at most, a long file is read in several polls
+
+
+# follows a csv file which is still being written (e.g. by a running simulation): every poll parses only the bytes
+# appended since the last poll, a partial last line is kept until it is complete. The samples are appended to
+# buffers, the published blocks are read-only views of the buffers, so appending never changes a published block.
+class CsvTail:
+    def __init__(self, path, csv_filename=None, window_rows=TAIL_WINDOW_ROWS):
+        self.path = Path(path)
+        self.csv_filename = csv_filename or self.path.name
+        self.window_rows = max(int(window_rows), 1)
+        self._reset()
+
+    def _reset(self):
+        self.rows_read = 0  # total number of parsed rows, including dropped ones
+        self.offset = 0  # bytes of the file which are parsed (or kept in partial)
+        self.partial = b''  # incomplete last line
+        self.columns = None  # all csv columns of the header
+        self.loaded_columns = None  # the time and signal columns
+        self.time = None  # buffers, the samples are in [start:end]
+        self.signals = None
+        self.start = 0
+        self.end = 0
+
+    # function to parse the bytes appended since the last poll
+    # returns the number of new samples and True if the file was rewritten (e.g. a new simulation run), then all
+    # earlier samples are dropped and the new samples are the whole file
+    # raises OSError if the file can not be read (the next poll reads the same bytes again) and ValueError if the
+    # lines can not be parsed (they are skipped, so the next poll continues after them)
+    def poll(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0, False
+        restarted = size < self.offset
+        if restarted:
+            self._reset()
+        if size == self.offset:
+            return 0, restarted
+
+        with open(self.path, 'rb') as csv_file:
+            csv_file.seek(self.offset)
+            data = self.partial + csv_file.read(TAIL_READ_BYTES)
+        self.offset += len(data) - len(self.partial)
+
+        # keep the incomplete last line for the next poll
+        line_end = data.rfind(b'\n') + 1
+        self.partial = data[line_end:]
+        data = data[:line_end]
+
+        if self.columns is None:
+            header_end = data.find(b'\n') + 1
+            if not header_end:
+                return 0, restarted  # the header is not complete yet
+            # empty column names (the trailing ';') are named like pandas does, so they are not loaded
+            self.columns = [column or f'Unnamed: {i}' for i, column in
+                            enumerate(data[:header_end].decode('utf-8').strip('\r\n').split(CSV_DELIMITER))]
+            self.loaded_columns = [column for column in self.columns if is_loaded_column(column)]
+            data = data[header_end:]
+        if not data:
+            return 0, restarted
+
+        return self._append(self._parse(data)), restarted
+
+    # function to parse complete lines into float64 column arrays
+    def _parse(self, data):
+        chunk = pd.read_csv(io.BytesIO(data), delimiter=CSV_DELIMITER, header=None, names=self.columns,
+                            usecols=self.loaded_columns, encoding='utf-8')
+        return {column: pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=np.float64) for column in self.loaded_columns}
+
+    # function to append parsed columns to the buffers and drop the samples outside the window
+    def _append(self, columns):
+        n_rows = len(next(iter(columns.values()), []))
+        time = columns.pop(TIME_COLUMN, None)
+        if time is None:
+            time = np.arange(self.rows_read, self.rows_read + n_rows, dtype=np.float64)  # use the sample index
+        self.rows_read += n_rows
+
+        # drop samples without time or older than the last sample, so the time axis stays sorted
+        last_time = self.time[self.end - 1] if self.end > self.start else -np.inf
+        valid = time > last_time
+        if not valid.all():
+            valid &= np.maximum.accumulate(np.where(np.isnan(time), -np.inf, time)) <= time
+            time = time[valid]
+            columns = {column: values[valid] for column, values in columns.items()}
+        n_new = len(time)
+        if not n_new:
+            return 0
+
+        # only the newest samples of a large batch fit into the window
+        if n_new > self.window_rows:
+            time = time[-self.window_rows:]
+            columns = {column: values[-self.window_rows:] for column, values in columns.items()}
+        self._reserve(len(time), columns)
+
+        end = self.end + len(time)
+        self.time[self.end:end] = time
+        for column, values in columns.items():
+            self._store(column, values)
+        self.end = end
+        self.start = max(self.start, self.end - self.window_rows)
+        return min(n_new, self.window_rows)
+
+    # function to write values to a signal buffer, float32 buffers are widened to float64 if float32 is not lossless
+    def _store(self, column, values):
+        buffer = self.signals[column]
+        if buffer.dtype == np.float32:
+            with np.errstate(over='ignore', invalid='ignore'):
+                narrow = values.astype(np.float32)
+            if not np.array_equal(narrow, values, equal_nan=True):
+                # only the stored samples are copied, the slots after end are not initialized
+                widened = np.empty(len(buffer), dtype=np.float64)
+                widened[self.start:self.end] = buffer[self.start:self.end]
+                buffer = self.signals[column] = widened
+            else:
+                values = narrow
+        buffer[self.end:self.end + len(values)] = values
+
+    # function to make room for n_new samples: the buffers grow up to twice the window, then the samples of the
+    # window are copied to new buffers. Published blocks keep the old buffers, so they are never changed.
+    def _reserve(self, n_new, columns):
+        if self.time is None:
+            capacity = max(TAIL_INITIAL_ROWS, n_new)
+            self.time = np.empty(capacity, dtype=np.float64)
+            self.signals = {column: np.empty(capacity, dtype=to_signal_array(values).dtype) for column, values in columns.items()}
+            return
+        if self.end + n_new <= len(self.time):
+            return
+
+        keep_start = max(self.start, self.end + n_new - self.window_rows)
+        n_keep = self.end - keep_start
+        capacity = max(min(2 * len(self.time), 2 * self.window_rows), n_keep + n_new)
+        self.time = self._moved(self.time, keep_start, n_keep, capacity)
+        self.signals = {column: self._moved(buffer, keep_start, n_keep, capacity) for column, buffer in self.signals.items()}
+        self.start, self.end = 0, n_keep
+
+    @staticmethod
+    def _moved(buffer, start, n_rows, capacity):
+        moved = np.empty(capacity, dtype=buffer.dtype)
+        moved[:n_rows] = buffer[start:start + n_rows]
+        return moved
+
+    # function to get the samples of the window as FileBlock, the arrays are views of the buffers (no copy)
+    def block(self):
+        if self.time is None:
+            return FileBlock(self.csv_filename, np.zeros(0), {})
+        window = slice(self.start, self.end)
+        return FileBlock(self.csv_filename, self.time[window], {column: buffer[window] for column, buffer in self.signals.items()})
+
+    def __len__(self):
+        return self.end - self.start
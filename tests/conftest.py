@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# make the application modules importable (main.py itself starts the app and is not imported)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,38 @@
+import numpy as np
+
+from alignment import TimeAligner, get_aligned_filename, is_aligned_filename
+from signal_store import FileBlock
+
+
+def make_block(csv_filename, time):
+    return FileBlock(csv_filename, time, {'sample': np.arange(len(time), dtype=np.float64)})
+
+
+def test_grid_at_the_sample_step_keeps_every_sample():
+    block = make_block('a.csv', np.arange(0, 1, 0.1))  # the median step is 0.09999999999999998
+    for method in ('asof', 'interpolate'):
+        for resolution in (None, 0.1):
+            aligned = TimeAligner().align([block], resolution=resolution, method=method)
+            np.testing.assert_allclose(aligned.signals['a.csv: sample'], np.arange(10), atol=1e-6)
+
+
+def test_file_sets_are_stored_as_separate_files():
+    a = make_block('a.csv', np.arange(0, 1, 0.1))
+    b = make_block('b.csv', np.arange(0, 1, 0.25))
+    c = make_block('c.csv', np.arange(0, 1, 0.5))
+    aligner = TimeAligner()
+    ab = aligner.align([b, a])
+    ac = aligner.align([a, c])
+
+    assert ab.csv_filename == get_aligned_filename(['a.csv', 'b.csv']) == 'Aligned: a.csv, b.csv'
+    assert ac.csv_filename == 'Aligned: a.csv, c.csv'
+    assert is_aligned_filename(ab.csv_filename) and not is_aligned_filename('a.csv')
+
+
+def test_times_outside_a_file_are_empty():
+    a = make_block('a.csv', np.arange(0, 1, 0.1))
+    b = make_block('b.csv', np.arange(0.5, 1, 0.1))
+    aligned = TimeAligner().align([a, b], method='asof')
+    values = aligned.signals['b.csv: sample']
+    assert np.isnan(values[:5]).all()
+    np.testing.assert_allclose(values[5:], np.arange(5))
@@ -0,0 +1,61 @@
+import numpy as np
+
+from client_view import PLOT_COLUMNS, ClientView
+from signal_store import FileBlock, SignalStore
+
+
+# stand-in for the ui.aggrid element, records the grid methods which are sent to the browser
+class FakeGrid:
+    def __init__(self, row_data):
+        self.options = {'rowData': row_data}
+        self.calls = []
+
+    def run_grid_method(self, name, *args):
+        self.calls.append((name, *args))
+
+
+def make_view(n_signals=5):
+    store = SignalStore()
+    time = np.arange(10.0)
+    store.add(FileBlock('a.csv', time, {f's{i}': time * i for i in range(n_signals)}))
+    view = ClientView(0, store, lambda fig: fig)
+    view.sync_signals()
+    view.grid = FakeGrid(view.get_grid_rows())
+    return view
+
+
+def test_grid_rows_use_the_row_position_as_id():
+    view = make_view()
+    rows = view.get_grid_rows()
+    assert [row['row_id'] for row in rows] == ['0', '1', '2', '3', '4']
+    assert rows[2] == {'csv_filename': 'a.csv', 'signal_name': 's2', **dict.fromkeys(PLOT_COLUMNS, True), 'row_id': '2'}
+    assert [row['row_id'] for row in view.get_grid_rows(np.array([3, 4]))] == ['3', '4']
+
+
+def test_only_changed_rows_are_sent_in_one_transaction():
+    view = make_view()
+    view.set_rows_value([1, 3], ['plot2'], False)
+    assert len(view.grid.calls) == 1
+    name, transaction = view.grid.calls[0]
+    assert name == 'applyTransaction'
+    assert [row['row_id'] for row in transaction['update']] == ['1', '3']
+
+    # the whole column: rows 1 and 3 are already deselected, only the others are sent
+    view.set_rows_value(np.arange(5), ['plot2'], False)
+    assert [row['row_id'] for row in view.grid.calls[1][1]['update']] == ['0', '2', '4']
+    assert view.df_signals['plot2'].tolist() == [False] * 5
+    assert view.df_signals['plot1'].tolist() == [True] * 5
+
+    view.set_rows_value(np.arange(5), ['plot2'], False)  # nothing changed, nothing is sent
+    assert len(view.grid.calls) == 2
+
+
+def test_row_data_stays_in_sync_by_position():
+    view = make_view()
+    row_data = view.grid.options['rowData']
+    view.set_rows_value([4, 0], PLOT_COLUMNS, False)
+    for position, row in enumerate(row_data):
+        assert row['row_id'] == str(position)
+        assert [row[column] for column in PLOT_COLUMNS] == view.df_signals.iloc[position][PLOT_COLUMNS].tolist()
+    assert view.grid.options['rowData'] is row_data  # updated in place
+    assert view.grid.calls[0][1]['update'][0] is row_data[4]
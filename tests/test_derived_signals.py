@@ -0,0 +1,38 @@
+import time
+
+import numpy as np
+import pytest
+
+from derived_signals import DerivedSignals, evaluate_expression
+from signal_store import FileBlock
+
+
+def make_signals(n=1000):
+    t = np.arange(n) * 1e-3
+    return t, {'x': np.sin(t), 'output.limit_active': (t > 0.5).astype(np.float32)}
+
+
+def test_integer_power_of_constants_is_not_evaluated_with_big_integers():
+    t, signals = make_signals()
+    start = time.perf_counter()
+    with pytest.raises(OverflowError):
+        evaluate_expression('x + 9**9**8', t, signals)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_function_arguments_stay_integers():
+    t, signals = make_signals()
+    values, inputs = evaluate_expression('round(rolling_mean(x, 10), 2) + duty(output.limit_active, 100)', t, signals)
+    assert inputs == ['x', 'output.limit_active']
+    assert np.isnan(values[:9]).all() and np.isfinite(values[99:]).all()
+    assert evaluate_expression('x * 2**3', t, signals)[0][1] == pytest.approx(signals['x'][1] * 8)
+
+
+def test_invalid_definition_is_rolled_back():
+    t, signals = make_signals()
+    derived_signals = DerivedSignals()
+    block = FileBlock('a.csv', t, signals)
+    derived_signals.define(block, 'y', 'x * 2')
+    with pytest.raises(ValueError):
+        derived_signals.define(block, 'y', 'unknown + 1')
+    assert derived_signals.definitions['a.csv'] == {'y': 'x * 2'}
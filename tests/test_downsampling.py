@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from downsampling import get_relayout_x_range, minmax_downsample, visible_slice
+
+
+def test_visible_slice_keeps_one_extra_sample_on_each_side():
+    x = np.arange(10.0)
+    assert visible_slice(x) == slice(0, 10)
+    assert visible_slice(x, (2.5, 6.5)) == slice(2, 8)  # 3..6 visible, 2 and 7 reach the plot border
+    assert visible_slice(x, (3, 6)) == slice(2, 8)
+    assert visible_slice(x, (-5, 100)) == slice(0, 10)
+    assert visible_slice(x, (20, 30)) == slice(9, 10)  # right of the data, the last sample stays
+
+
+def test_short_trace_is_unchanged():
+    x, y = np.arange(10.0), np.arange(10.0)
+    x_down, y_down = minmax_downsample(x, y, max_points=10)
+    assert x_down is x and y_down is y
+
+
+def test_spikes_and_the_first_and_last_sample_survive():
+    rng = np.random.default_rng(0)
+    x = np.arange(100_000) * 1e-3
+    y = rng.normal(size=len(x))
+    y[12_345], y[67_890] = 100.0, -100.0
+
+    x_down, y_down = minmax_downsample(x, y, max_points=200)
+    assert len(x_down) <= 200 + 2
+    assert x_down[0] == x[0] and x_down[-1] == x[-1]
+    assert np.all(np.diff(x_down) > 0)
+    assert y_down.max() == 100.0 and y_down.min() == -100.0
+    assert x_down[y_down.argmax()] == x[12_345]
+
+
+def test_nan_samples_never_win_and_nan_buckets_keep_a_gap():
+    x = np.arange(1000.0)
+    y = np.sin(x)
+    y[::7] = np.nan
+    y[500:600] = np.nan  # whole buckets without a value
+
+    x_down, y_down = minmax_downsample(x, y, max_points=20)
+    gap = (x_down >= 500) & (x_down < 600)
+    assert gap.any() and np.isnan(y_down[gap]).all()  # the line is interrupted like in the raw trace
+    assert not np.isnan(y_down[~gap & (x_down % 7 != 0)]).any()
+
+
+@pytest.mark.parametrize('relayout_data, expected', [
+    ({'xaxis.range[0]': 1, 'xaxis.range[1]': 2}, (True, (1, 2))),
+    ({'xaxis.range': [3, 4]}, (True, (3, 4))),
+    ({'xaxis.autorange': True}, (True, None)),
+    ({'yaxis.range[0]': 1, 'yaxis.range[1]': 2}, (False, None)),
+    ({'xaxis.range[0]': 1}, (False, None)),
+])
+def test_relayout_x_range(relayout_data, expected):
+    assert get_relayout_x_range(relayout_data) == expected
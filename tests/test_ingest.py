@@ -0,0 +1,81 @@
+import asyncio
+import io
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import IngestCancelled, open_upload, read_csv_block
+
+
+def make_csv(n_rows=1000):
+    time = np.arange(n_rows) * 1e-3
+    lines = ['Time;current;limit_active;'] + [f'{t:.6g};{np.sin(t * 50):.6g};{int(t > 0.5)};' for t in time]
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def test_chunked_parse_matches_read_csv(tmp_path):
+    data = make_csv()
+    expected = pd.read_csv(io.BytesIO(data), delimiter=';')
+    path = tmp_path / 'run.csv'
+    path.write_bytes(data)
+
+    for source in (io.BytesIO(data), str(path)):
+        block = read_csv_block(source, 'run.csv', chunksize=64)
+        assert block.signal_names == ['current', 'limit_active']  # the empty 'Unnamed' column is no signal
+        np.testing.assert_array_equal(block.time, expected['Time'].to_numpy())
+        np.testing.assert_array_equal(block.signals['current'], expected['current'].to_numpy())
+        assert block.signals['limit_active'].dtype == np.float32  # lossless narrowing
+
+
+def test_progress_is_reported_per_chunk():
+    fractions = []
+    read_csv_block(io.BytesIO(make_csv()), 'run.csv', progress=fractions.append, chunksize=100)
+    assert len(fractions) > 5
+    assert fractions == sorted(fractions)
+    assert fractions[-1] == 1.0
+
+
+def test_cancelled_parse_raises():
+    cancel_event = threading.Event()
+
+    def cancel_after_first_chunk(fraction):
+        cancel_event.set()
+
+    with pytest.raises(IngestCancelled):
+        read_csv_block(io.BytesIO(make_csv()), 'run.csv', progress=cancel_after_first_chunk,
+                       cancel_event=cancel_event, chunksize=100)
+
+
+# upload events of nicegui 2.x (name, content) and 3.x (file with name and iterate)
+class UploadEvent2:
+    def __init__(self, name, data):
+        self.name = name
+        self.content = io.BytesIO(data)
+
+
+class FileUpload3:
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+
+    async def iterate(self, chunk_size=7):
+        for i in range(0, len(self.data), chunk_size):
+            yield self.data[i:i + chunk_size]
+
+
+class UploadEvent3:
+    def __init__(self, name, data):
+        self.file = FileUpload3(name, data)
+
+
+@pytest.mark.parametrize('event_class', [UploadEvent2, UploadEvent3])
+def test_upload_events_of_both_nicegui_versions(event_class):
+    data = make_csv(50)
+    csv_filename, stream = asyncio.run(open_upload(event_class('run.csv', data)))
+    with stream:
+        assert csv_filename == 'run.csv'
+        assert stream.read() == data
+        stream.seek(0)
+        assert len(read_csv_block(stream, csv_filename)) == 50
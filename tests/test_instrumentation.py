@@ -0,0 +1,35 @@
+import importlib
+import logging
+
+import instrumentation
+
+
+def test_env_var_logs_every_event(monkeypatch, caplog):
+    monkeypatch.setenv('PLOTTING_PROFILE', '1')
+    module = importlib.reload(instrumentation)
+    try:
+        @module.profiled
+        def fast_event():
+            return 1
+
+        with caplog.at_level(logging.INFO, logger='PlottingApplication.profile'):
+            assert fast_event() == 1
+        assert module.logger.level == logging.INFO
+        assert [record.levelno for record in caplog.records] == [logging.INFO]
+        assert 'fast_event' in caplog.records[0].getMessage()
+    finally:
+        monkeypatch.delenv('PLOTTING_PROFILE')
+        importlib.reload(instrumentation)
+
+
+def test_profiling_is_off_by_default(monkeypatch, caplog):
+    monkeypatch.delenv('PLOTTING_PROFILE', raising=False)
+    module = importlib.reload(instrumentation)
+
+    @module.profiled
+    def event():
+        return 2
+
+    with caplog.at_level(logging.INFO, logger='PlottingApplication.profile'):
+        assert event() == 2
+    assert not caplog.records
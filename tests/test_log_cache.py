@@ -0,0 +1,37 @@
+from ingest import cache_csv_file, read_csv_block
+from log_cache import LogCache
+
+CSV_DATA = 'Time;a;b;\n0;1;2;\n0.001;3;4;\n0.002;5;6;\n'
+
+
+def write_log(tmp_path):
+    path = tmp_path / 'run.csv'
+    path.write_text(CSV_DATA, encoding='utf-8')
+    return path
+
+
+def test_cached_log_is_only_sent_back_as_digest(tmp_path):
+    path = write_log(tmp_path)
+    cache_dir = tmp_path / 'cache'
+    digest, hit, block = cache_csv_file(str(path), cache_dir, 1e9)
+    assert (hit, block) == (False, None)
+    assert LogCache(cache_dir).open(digest, 'run.csv').signals['b'].tolist() == [2, 4, 6]
+    assert cache_csv_file(str(path), cache_dir, 1e9) == (digest, True, None)
+
+
+def test_parsed_log_is_sent_back_if_the_cache_is_not_writable(tmp_path):
+    path = write_log(tmp_path)
+    cache_dir = tmp_path / 'not_a_directory'
+    cache_dir.write_text('')
+    _, hit, block = cache_csv_file(str(path), cache_dir, 1e9)
+    assert not hit
+    assert block.signals['a'].tolist() == [1, 3, 5]
+
+
+def test_log_larger_than_the_cache_is_not_stored(tmp_path):
+    path = write_log(tmp_path)
+    cache = LogCache(tmp_path / 'cache', max_bytes=10)
+    assert not cache.store('digest', read_csv_block(str(path), 'run.csv'))
+    assert not cache.contains('digest')
+    _, _, block = cache_csv_file(str(path), cache.cache_dir, cache.max_bytes)
+    assert block is not None
@@ -0,0 +1,52 @@
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+import plot_client
+from plot_client import decode_array, encode_array, encode_arrays, encode_figure
+
+
+@pytest.mark.parametrize('dtype, expected', [
+    ('float64', 'f8'), ('float32', 'f4'), ('int32', 'i4'), ('uint32', 'u4'),
+    ('int16', 'i2'), ('uint16', 'u2'), ('int8', 'i1'), ('uint8', 'u1'),
+])
+def test_typed_array_round_trip(dtype, expected):
+    values = np.arange(-3, 4).astype(dtype)
+    spec = encode_array(values)
+    assert spec['dtype'] == expected
+    assert decode_array(spec) == values.tolist()
+
+
+@pytest.mark.parametrize('values', [np.array([0, 2 ** 40, -5], dtype=np.int64), np.array([True, False, True])])
+def test_int64_and_bool_are_widened_to_float64(values):
+    spec = encode_array(values)
+    assert spec['dtype'] == 'f8'
+    assert decode_array(spec) == values.astype(np.float64).tolist()
+
+
+def test_big_endian_and_strided_arrays_are_sent_little_endian():
+    values = np.arange(10.0)
+    assert decode_array(encode_array(values.astype('>f8'))) == values.tolist()
+    assert decode_array(encode_array(values[::3])) == values[::3].tolist()
+
+
+def test_arrays_without_typed_array_stay_lists():
+    assert encode_array(np.array(['a', 'b'])) == ['a', 'b']
+    assert encode_array(np.ones((2, 2))) == [[1.0, 1.0], [1.0, 1.0]]
+
+
+def test_plain_json_transport_decodes_bdata():
+    data = {'x': np.arange(3.0), 'y': encode_array(np.arange(3, dtype=np.float32)), 'name': 's', 'line': {'width': 1}}
+    assert encode_arrays(data, binary=False) == {'x': [0.0, 1.0, 2.0], 'y': [0.0, 1.0, 2.0], 'name': 's', 'line': {'width': 1}}
+
+    encoded = encode_arrays(data, binary=True)
+    assert encoded['x'] == encode_array(np.arange(3.0))
+    assert encoded['y'] == data['y']
+
+
+def test_binary_transport_switch(monkeypatch):
+    fig = go.Figure(go.Scatter(x=np.arange(3.0), y=np.arange(3, dtype=np.float32)))
+    monkeypatch.setattr(plot_client, 'BINARY_TRANSPORT', False)
+    assert encode_figure(fig)['data'][0]['y'] == [0.0, 1.0, 2.0]
+    monkeypatch.setattr(plot_client, 'BINARY_TRANSPORT', True)
+    assert decode_array(encode_figure(fig)['data'][0]['y']) == [0.0, 1.0, 2.0]
@@ -0,0 +1,90 @@
+import base64
+
+import numpy as np
+import pytest
+
+from client_view import ClientView
+from plot_client import EncodedPlotly
+from signal_store import FileBlock, SignalStore
+
+
+# stand-in for the nicegui client, records the plotly.js calls
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def run_javascript(self, code):
+        self.calls.append(code)
+
+
+# stand-in for an EncodedPlotly element, sent() is the figure the browser gets when the element is updated
+class FakePlot:
+    def __init__(self, client):
+        self.client = client
+        self.id = 0
+        self.figure = None
+
+    def update_figure(self, figure):
+        self.figure = figure
+
+    def sent(self):
+        return EncodedPlotly._get_figure_json(self)
+
+
+def make_view(store):
+    view = ClientView(0, store, lambda fig: fig)
+    view.client = FakeClient()
+    for plot_view in view.plot_views:
+        plot_view.plot = FakePlot(view.client)
+    return view
+
+
+# function to add the new files to the view like main.show_view_files: new rows, traces of the selected rows
+def show_files(view, selected_plots=('plot1',)):
+    view.sync_signals()
+    view.df_signals[list(selected_plots)] = True
+    for plot_view in view.plot_views:
+        plot_view.sync_selection(view.df_signals)
+
+
+def test_layout_change_keeps_added_traces_and_zoom():
+    store = SignalStore()
+    time = np.arange(0.0, 100.0, 0.01)
+    store.add(FileBlock('a.csv', time, {'s': np.sin(time)}))
+    view = make_view(store)
+    show_files(view)
+    plot_view = view.plot_views[0]
+    plot_view.build(view.df_signals)
+
+    plot_view.set_x_range((10.0, 20.0))
+    store.add(FileBlock('b.csv', time, {'c': np.cos(time)}))
+    show_files(view)
+
+    # a layout or drawer toggle sends the figure of the element again
+    sent = plot_view.plot.sent()
+    assert [trace['name'] for trace in sent['data']] == [trace.name for trace in plot_view.fig.data]
+    assert len(sent['data']) == 2
+    assert list(sent['layout']['xaxis']['range']) == [10.0, 20.0]
+    x = np.frombuffer(base64.b64decode(sent['data'][1]['x']['bdata']), dtype='<f8')
+    assert x[0] >= 10.0 - 0.01 and x[-1] <= 20.0 + 0.01  # the data of the zoom window
+
+    # the rows still point at the traces the browser has
+    assert plot_view.row_trace[view.df_signals.index[view.df_signals['csv_filename'] == 'b.csv']].tolist() == [1]
+
+
+def test_layout_change_keeps_render_mode():
+    store = SignalStore()
+    time = np.arange(0.0, 10.0, 0.01)
+    store.add(FileBlock('a.csv', time, {'s': np.sin(time)}))
+    view = make_view(store)
+    show_files(view)
+    plot_view = view.plot_views[0]
+    plot_view.build(view.df_signals)
+
+    with pytest.raises(ValueError):
+        plot_view.set_render_mode('canvas')
+    assert plot_view.render_mode == 'auto'
+
+    plot_view.set_render_mode('webgl')
+    assert plot_view.plot.figure is plot_view.fig
+    assert {trace['type'] for trace in plot_view.plot.sent()['data']} == {'scattergl'}
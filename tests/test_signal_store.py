@@ -0,0 +1,46 @@
+import warnings
+
+import numpy as np
+
+from client_view import ClientView
+from signal_store import FileBlock, SignalStore, to_signal_array
+
+
+def make_block(csv_filename):
+    time = np.arange(5.0)
+    return FileBlock(csv_filename, time, {'signal': time.copy()})
+
+
+def test_file_is_dropped_with_its_last_client():
+    store = SignalStore()
+    store.add(make_block('upload.csv'))
+    views = [ClientView(client_id, store, lambda fig: fig) for client_id in range(2)]
+    for view in views:
+        view.sync_signals()
+    assert store.ref_count('upload.csv') == 2
+
+    assert views[0].close() == []
+    assert store.filenames == ['upload.csv']
+    assert views[1].close() == ['upload.csv']
+    assert store.empty
+
+
+def test_pinned_file_stays_loaded_without_clients():
+    store = SignalStore()
+    store.pin(['startup.csv'])
+    store.add(make_block('startup.csv'))
+    view = ClientView(0, store, lambda fig: fig)
+    view.sync_signals()
+
+    assert view.close() == []
+    assert store.filenames == ['startup.csv']
+    assert store.unpin(['startup.csv']) == ['startup.csv']
+    assert store.empty
+
+
+def test_values_beyond_float32_stay_float64_without_warning():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        values = to_signal_array([1.0, 1e300, -1e300, np.nan])
+    assert values.dtype == np.float64
+    assert to_signal_array([0.5, np.nan]).dtype == np.float32
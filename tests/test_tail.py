@@ -0,0 +1,153 @@
+import numpy as np
+import pytest
+
+import tail
+from ingest import read_csv_block
+from tail import CsvTail
+
+
+def make_lines(start, stop, n_signals=2):
+    return ''.join(f'{i * 0.001:.6g};' + ';'.join(f'{np.sin(i + j):.6g}' for j in range(n_signals)) + ';\n'
+                   for i in range(start, stop)).encode()
+
+
+HEADER = b'Time;a;b;\n'
+
+
+def append(path, data):
+    with open(path, 'ab') as csv_file:
+        csv_file.write(data)
+
+
+def assert_same_block(block, expected, last_rows=None):
+    rows = slice(-last_rows, None) if last_rows else slice(None)
+    np.testing.assert_array_equal(block.time, expected.time[rows])
+    assert list(block.signals) == list(expected.signals)
+    for signal_name, values in expected.signals.items():
+        np.testing.assert_array_equal(block.signals[signal_name], values[rows])
+
+
+def test_missing_file_and_partial_header(tmp_path):
+    path = tmp_path / 'run.csv'
+    csv_tail = CsvTail(path)
+    assert csv_tail.poll() == (0, False)
+
+    append(path, b'Time;a')
+    assert csv_tail.poll() == (0, False)
+    append(path, b';b;\n' + make_lines(0, 3))
+    assert csv_tail.poll() == (3, False)
+    assert list(csv_tail.block().signals) == ['a', 'b']  # the empty column of the trailing ';' is no signal
+
+
+def test_lines_split_across_writes_are_parsed_once_complete(tmp_path):
+    path = tmp_path / 'run.csv'
+    data = HEADER + make_lines(0, 2000)
+    rng = np.random.default_rng(0)
+    cuts = np.sort(rng.choice(np.arange(1, len(data)), 50, replace=False))
+
+    csv_tail = CsvTail(path)
+    n_rows = 0
+    for start, end in zip([0, *cuts], [*cuts, len(data)]):
+        append(path, data[start:end])
+        n_new, restarted = csv_tail.poll()
+        assert not restarted
+        n_rows += n_new
+        assert n_rows == data[:end].count(b'\n') - 1  # only complete lines
+
+    assert_same_block(csv_tail.block(), read_csv_block(str(path), 'run.csv'))
+
+
+def test_rewritten_file_restarts(tmp_path):
+    path = tmp_path / 'run.csv'
+    path.write_bytes(HEADER + make_lines(0, 100))
+    csv_tail = CsvTail(path)
+    assert csv_tail.poll() == (100, False)
+
+    path.write_bytes(HEADER + make_lines(0, 10))  # a new run overwrote the file
+    assert csv_tail.poll() == (10, True)
+    assert len(csv_tail) == 10
+    assert csv_tail.rows_read == 10
+    assert_same_block(csv_tail.block(), read_csv_block(str(path), 'run.csv'))
+
+
+def test_window_keeps_the_newest_rows_and_published_blocks_do_not_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(tail, 'TAIL_INITIAL_ROWS', 16)  # compact the buffers often
+    path = tmp_path / 'run.csv'
+    append(path, HEADER)
+    csv_tail = CsvTail(path, window_rows=100)
+
+    published = []
+    for start in range(0, 1000, 37):
+        append(path, make_lines(start, start + 37))
+        n_new, _ = csv_tail.poll()
+        assert n_new == 37
+        block = csv_tail.block()
+        published.append((block, block.time.copy(), block.signals['a'].copy()))
+        assert len(block) == min(start + 37, 100)
+        assert len(csv_tail.time) <= 200  # the buffers grow up to twice the window
+
+    for block, time, values in published:
+        np.testing.assert_array_equal(block.time, time)
+        np.testing.assert_array_equal(block.signals['a'], values)
+    assert_same_block(csv_tail.block(), read_csv_block(str(path), 'run.csv'), last_rows=100)
+
+
+def test_batch_larger_than_the_window(tmp_path):
+    path = tmp_path / 'run.csv'
+    path.write_bytes(HEADER + make_lines(0, 500))
+    csv_tail = CsvTail(path, window_rows=50)
+    assert csv_tail.poll() == (50, False)
+    assert_same_block(csv_tail.block(), read_csv_block(str(path), 'run.csv'), last_rows=50)
+
+
+def test_rows_without_time_or_out_of_order_are_dropped(tmp_path):
+    path = tmp_path / 'run.csv'
+    path.write_bytes(HEADER + b'0;1;1;\n0.002;2;2;\n;3;3;\n0.001;4;4;\n0.003;5;5;\n')
+    csv_tail = CsvTail(path)
+    assert csv_tail.poll() == (3, False)
+    np.testing.assert_array_equal(csv_tail.block().time, [0, 0.002, 0.003])
+    np.testing.assert_array_equal(csv_tail.block().signals['a'], [1, 2, 5])
+
+    append(path, b'0.002;6;6;\n0.004;7;7;\n')  # older than the last sample of the previous poll
+    assert csv_tail.poll() == (1, False)
+    assert csv_tail.rows_read == 7
+
+
+def test_float32_buffer_is_widened_when_values_need_float64(tmp_path):
+    path = tmp_path / 'run.csv'
+    path.write_bytes(HEADER + b'0;0.5;1;\n0.001;0.25;2;\n')
+    csv_tail = CsvTail(path)
+    csv_tail.poll()
+    assert csv_tail.block().signals['a'].dtype == np.float32
+
+    append(path, b'0.002;0.1;3;\n')
+    csv_tail.poll()
+    values = csv_tail.block().signals['a']
+    assert values.dtype == np.float64
+    assert values.tolist() == pytest.approx([0.5, 0.25, 0.1], abs=0)
+    assert csv_tail.block().signals['b'].dtype == np.float32
+
+
+def test_lines_which_can_not_be_parsed_are_skipped(tmp_path):
+    path = tmp_path / 'run.csv'
+    path.write_bytes(HEADER + b'0;1;1;\n')
+    csv_tail = CsvTail(path)
+    assert csv_tail.poll() == (1, False)
+
+    append(path, b'0.001;\xff;2;\n')  # not utf-8
+    with pytest.raises(ValueError):
+        csv_tail.poll()
+    append(path, b'0.002;3;3;\n')
+    assert csv_tail.poll() == (1, False)
+    np.testing.assert_array_equal(csv_tail.block().time, [0, 0.002])
+
+
+def test_values_beyond_float32_start_a_float64_buffer(tmp_path):
+    path = tmp_path / 'run.csv'
+    path.write_bytes(HEADER + b'0;1e300;1;\n')
+    csv_tail = CsvTail(path)
+    csv_tail.poll()
+    append(path, b'0.001;2;1e300;\n')
+    csv_tail.poll()
+    assert csv_tail.block().signals['a'].dtype == np.float64
+    assert csv_tail.block().signals['b'].tolist() == [1, 1e300]